@@ -0,0 +1,61 @@
+from transformers import AutoTokenizer
+from inference import analyze_texts, load_model
+import sys
+import os
+
+MODEL_PATH = os.path.join(os.path.dirname(__file__), "model")
+SCORE_TOLERANCE = float(os.getenv("BERT_SCORE_TOLERANCE", 0.05))
+MIN_LABEL_AGREEMENT = float(os.getenv("BERT_MIN_LABEL_AGREEMENT", 0.95))
+
+# fixed review corpus used to compare a backend against the fp32 baseline
+REVIEW_CORPUS = [
+    "An absolute masterpiece. The acting, the score and the cinematography are all flawless.",
+    "I walked out halfway through. Boring, predictable and far too long.",
+    "The first season was brilliant, but the show lost its way after that.",
+    "Not bad, not great. A decent way to spend a rainy afternoon.",
+    "One of the worst films I have ever seen. The plot makes no sense at all.",
+    "The lead actress carries the whole movie on her shoulders and she is superb.",
+    "Visually stunning but emotionally empty.",
+    "I laughed from start to finish, easily the funniest comedy of the year.",
+    "The dialogue is wooden and the special effects look cheap.",
+    "A slow burn that rewards patience with a devastating final act.",
+    "Terrible pacing, a wasted cast and an ending that insults the audience.",
+    "My kids loved it and honestly so did I.",
+    "It tries to be clever but ends up being confusing and pretentious.",
+    "The soundtrack alone is worth the price of admission.",
+    "Overhyped. I expected much more after all the awards.",
+    "A heartfelt story about family, told with warmth and humour.",
+    "The sequel nobody asked for, and it shows.",
+    "Gripping from the very first scene, I could not look away.",
+    "Some good ideas, poorly executed.",
+    "Ten out of ten, I will be rewatching this for years."
+]
+
+def compare_backends(backend, baseline="fp32", texts=REVIEW_CORPUS):
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH)
+    expected = analyze_texts(texts, tokenizer, load_model(MODEL_PATH, baseline))
+    actual = analyze_texts(texts, tokenizer, load_model(MODEL_PATH, backend))
+
+    agreements = 0
+    max_score_diff = 0.0
+    for exp, act in zip(expected, actual):
+        if exp["label"] == act["label"]:
+            agreements += 1
+            max_score_diff = max(max_score_diff, abs(exp["score"] - act["score"]))
+        else:
+            print(f"### Label mismatch ({exp['label']} -> {act['label']}): {exp['review'][:60]} ###")
+
+    label_agreement = agreements / len(expected) if expected else 1.0
+    return {
+        "backend": backend,
+        "baseline": baseline,
+        "label_agreement": round(label_agreement, 3),
+        "max_score_diff": round(max_score_diff, 3),
+        "passed": label_agreement >= MIN_LABEL_AGREEMENT and max_score_diff <= SCORE_TOLERANCE
+    }
+
+if __name__ == "__main__":
+    # usage: python api/accuracy_check.py [backend]
+    report = compare_backends(sys.argv[1] if len(sys.argv) > 1 else "int8")
+    print(f"### Accuracy check: {report} ###")
+    sys.exit(0 if report["passed"] else 1)
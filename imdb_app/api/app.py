@@ -1,16 +1,67 @@
-from flask import Flask, request, jsonify
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-from torch.nn.functional import softmax
-import torch
+from flask import Flask, Response, request, jsonify, stream_with_context
+from transformers import AutoTokenizer
+from inference import analyze_texts, load_model, BACKEND
+from batch_scheduler import MicroBatchScheduler
+from result_cache import SentimentCache, model_fingerprint
+from process_stats import memory_usage
+import threading
+import json
+import time
 import os
 
+PROCESS_STARTED = time.monotonic()
+STREAM_CHUNK_SIZE = int(os.getenv("BERT_STREAM_CHUNK_SIZE", 32))
+
 app = Flask(__name__)
 
 MODEL_PATH = os.path.join(os.path.dirname(__file__), "model")
 
 # loading model and tokenizer
 tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH)
-model = AutoModelForSequenceClassification.from_pretrained(MODEL_PATH)
+model = load_model(MODEL_PATH)
+MODEL_LOAD_SECONDS = round(time.monotonic() - PROCESS_STARTED, 3)
+
+# shared batches across concurrent requests
+scheduler = MicroBatchScheduler(lambda texts: analyze_texts(texts, tokenizer, model))
+MODEL_VERSION = model_fingerprint(MODEL_PATH, BACKEND)
+cache = SentimentCache(MODEL_VERSION)
+
+# readiness: set once a warm-up inference has completed in this process
+ready = threading.Event()
+warm_up_state = {"pid": None, "seconds": None, "cold_start_seconds": None}
+
+def _warm_up():
+    started = time.monotonic()
+    try:
+        analyze_texts(["Warm-up review: a great movie."], tokenizer, model)
+    except Exception as e:
+        print(f"### Warm-up inference failed: {e} ###")
+        return
+    warm_up_state["seconds"] = round(time.monotonic() - started, 3)
+    warm_up_state["cold_start_seconds"] = round(time.monotonic() - PROCESS_STARTED, 3)
+    ready.set()
+    print(f"### Worker {os.getpid()} ready after {warm_up_state['cold_start_seconds']}s ###")
+
+def start_warm_up():
+    # called once per process (after fork under gunicorn)
+    if warm_up_state["pid"] == os.getpid():
+        return
+    warm_up_state["pid"] = os.getpid()
+    ready.clear()
+    threading.Thread(target=_warm_up, name="bert-warm-up", daemon=True).start()
+
+def _analyze_with_cache(texts):
+    cached = cache.get_many(texts)
+    misses = list(dict.fromkeys(text for text, hit in zip(texts, cached) if hit is None))
+
+    # only cache misses reach the model
+    if misses:
+        computed = scheduler.analyze(misses)
+        cache.put_many(misses, [{"label": r["label"], "score": r["score"]} for r in computed])
+        by_text = {text: r for text, r in zip(misses, computed)}
+        cached = [hit if hit is not None else by_text[text] for text, hit in zip(texts, cached)]
+
+    return [{"label": hit["label"], "score": hit["score"], "review": text} for text, hit in zip(texts, cached)]
 
 @app.route("/analyze", methods=["POST"])
 def analyze():
@@ -21,24 +72,78 @@ def analyze():
     if not texts or not isinstance(texts, list):
         return jsonify({"error": "Missing 'texts' list in request"}), 400
 
-    results = []
-    
+    # blank texts are skipped before queueing so results map back one-to-one
+    texts = [text for text in texts if text.strip()]
+    results = _analyze_with_cache(texts)
+
+    return jsonify(results), 200, {"X-Model-Version": MODEL_VERSION}
+
+@app.route("/model", methods=["GET"])
+def model_info():
+    # clients store results under this version and only reuse results of the same one
+    return jsonify({"model_version": MODEL_VERSION, "backend": BACKEND}), 200
+
+def _iter_ndjson_texts(stream):
+    # read line by line as the body arrives, one JSON string (or {"text": ...}) per line
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        item = json.loads(line)
+        yield item.get("text", "") if isinstance(item, dict) else item
+
+def _iter_chunks(texts, size):
+    chunk = []
     for text in texts:
-        if not text.strip():
+        if not isinstance(text, str) or not text.strip():
             continue
-        inputs = tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
-        with torch.no_grad():
-            outputs = model(**inputs) # model execution
-            probs = softmax(outputs.logits, dim=1)[0] # convert logits to class probabilities using softmax
-            label_idx = torch.argmax(probs).item()  # get the index of the class with the highest probability
-            labels = ["NEGATIVE", "POSITIVE"]
-            results.append({
-                "label": labels[label_idx],
-                "score": round(probs[label_idx].item(), 3),
-                "review": text
-            })
-
-    return jsonify(results), 200
+        chunk.append(text)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+@app.route("/analyze/stream", methods=["POST"])
+def analyze_stream():
+    if request.mimetype == "application/x-ndjson":
+        texts = _iter_ndjson_texts(request.stream)
+    else:
+        data = request.get_json(silent=True) or {}
+        texts = data.get("texts")
+        if not texts or not isinstance(texts, list):
+            return jsonify({"error": "Missing 'texts' list in request"}), 400
+
+    def generate():
+        index = 0
+        try:
+            # one NDJSON line per result, flushed as soon as its batch is scored
+            for chunk in _iter_chunks(texts, STREAM_CHUNK_SIZE):
+                for result in _analyze_with_cache(chunk):
+                    yield json.dumps({"index": index, **result}) + "\n"
+                    index += 1
+        except ValueError as e:
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson", headers={"X-Model-Version": MODEL_VERSION})
+
+@app.route("/ready", methods=["GET"])
+def readiness():
+    if not ready.is_set():
+        return jsonify({"ready": False, "pid": os.getpid()}), 503
+    return jsonify({"ready": True, "pid": os.getpid()}), 200
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    process = memory_usage()
+    process.update({
+        "model_load_seconds": MODEL_LOAD_SECONDS,
+        "warm_up_seconds": warm_up_state["seconds"],
+        "cold_start_seconds": warm_up_state["cold_start_seconds"],
+        "ready": ready.is_set()
+    })
+    return jsonify({"scheduler": scheduler.metrics(), "cache": cache.stats(), "process": process}), 200
 
 if __name__ == "__main__":
+    start_warm_up()
     app.run(debug=True, host="0.0.0.0", port=5000)
@@ -0,0 +1,131 @@
+from concurrent.futures import Future
+import threading
+import queue
+import time
+import os
+
+MAX_BATCH_SIZE = int(os.getenv("BERT_MAX_BATCH_SIZE", 64))
+MAX_WAIT_MS = float(os.getenv("BERT_MAX_WAIT_MS", 10))
+
+HISTOGRAM_BOUNDS = [1, 2, 4, 8, 16, 32, 64, 128, 256, 512]
+
+class Histogram:
+    def __init__(self, bounds=HISTOGRAM_BOUNDS):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1) # last bucket is +Inf
+        self.total = 0
+        self.sum = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                break
+        else:
+            i = len(self.bounds)
+        self.counts[i] += 1
+        self.total += 1
+        self.sum += value
+
+    def snapshot(self):
+        labels = [f"le_{b}" for b in self.bounds] + ["le_inf"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "count": self.total,
+            "mean": round(self.sum / self.total, 3) if self.total else 0
+        }
+
+class MicroBatchScheduler:
+    def __init__(self, handler, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        # handler: callable taking a flat list of texts and returning one result per text
+        self.handler = handler
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000
+        self._queue = queue.Queue()
+        self._pending_texts = 0
+        self._lock = threading.Lock()
+        self._worker = None
+        self._worker_pid = None
+        self.batch_sizes = Histogram()
+        self.requests_per_batch = Histogram()
+        self.queue_depths = Histogram()
+
+    def _ensure_worker(self):
+        # threads do not survive fork, so every worker process starts its own
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive() and self._worker_pid == os.getpid():
+                return
+            self._queue = queue.Queue()
+            self._pending_texts = 0
+            self._worker = threading.Thread(target=self._run, name="bert-batch-scheduler", daemon=True)
+            self._worker_pid = os.getpid()
+            self._worker.start()
+
+    def submit(self, texts):
+        future = Future()
+        if not texts:
+            future.set_result([])
+            return future
+
+        self._ensure_worker()
+        with self._lock:
+            self._pending_texts += len(texts)
+        self._queue.put((list(texts), future))
+        return future
+
+    def analyze(self, texts, timeout=None):
+        return self.submit(texts).result(timeout=timeout)
+
+    def _collect(self):
+        first = self._queue.get()
+        jobs = [first]
+        size = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+
+        # keep gathering concurrent requests until the batch is full or the wait expires
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                job = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            jobs.append(job)
+            size += len(job[0])
+
+        return jobs, size
+
+    def _run(self):
+        while True:
+            jobs, size = self._collect()
+            with self._lock:
+                self.queue_depths.observe(self._pending_texts)
+                self._pending_texts -= size
+                self.batch_sizes.observe(size)
+                self.requests_per_batch.observe(len(jobs))
+
+            flat = [text for texts, _ in jobs for text in texts]
+            try:
+                results = self.handler(flat)
+            except Exception as e:
+                print(f"### Batch inference failed: {e} ###")
+                for _, future in jobs:
+                    future.set_exception(e)
+                continue
+
+            # route each slice of the shared batch back to the request that sent it
+            offset = 0
+            for texts, future in jobs:
+                future.set_result(results[offset:offset + len(texts)])
+                offset += len(texts)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "queue_depth": self._pending_texts,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "queue_depth_histogram": self.queue_depths.snapshot(),
+                "batch_size_histogram": self.batch_sizes.snapshot(),
+                "requests_per_batch_histogram": self.requests_per_batch.snapshot()
+            }
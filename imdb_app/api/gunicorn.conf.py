@@ -0,0 +1,32 @@
+# production serving: gunicorn -c api/gunicorn.conf.py
+import multiprocessing
+import gc
+import os
+
+chdir = os.path.dirname(os.path.abspath(__file__))
+wsgi_app = "app:app"
+bind = f"0.0.0.0:{os.getenv('API_PORT', 5000)}"
+
+workers = int(os.getenv("API_WORKERS", max(1, multiprocessing.cpu_count() // 2)))
+# threads let concurrent requests inside a worker share scheduler batches
+worker_class = "gthread"
+threads = int(os.getenv("API_THREADS", 4))
+timeout = int(os.getenv("API_TIMEOUT", 120))
+
+# load the model once in the master so forked workers share its pages copy-on-write
+preload_app = True
+
+def when_ready(server):
+    # move everything allocated so far out of the GC's reach, so collections in the
+    # workers do not touch (and un-share) the preloaded objects
+    gc.freeze()
+    server.log.info("### Model preloaded, forking %s workers ###", workers)
+
+def post_fork(server, worker):
+    import torch
+    import app as app_module
+
+    # split the cores between workers unless set explicitly
+    num_threads = int(os.getenv("BERT_NUM_THREADS", 0)) or max(1, multiprocessing.cpu_count() // workers)
+    torch.set_num_threads(num_threads)
+    app_module.start_warm_up()
@@ -0,0 +1,82 @@
+from transformers import AutoModelForSequenceClassification
+from torch.nn.functional import softmax
+import torch
+import os
+
+LABELS = ["NEGATIVE", "POSITIVE"]
+MAX_LENGTH = 512
+BATCH_SIZE = int(os.getenv("BERT_BATCH_SIZE", 32))
+
+# CPU backend: "fp32" (default) or "int8" (dynamic quantization of the linear layers)
+BACKEND = os.getenv("BERT_BACKEND", "fp32").lower()
+NUM_THREADS = int(os.getenv("BERT_NUM_THREADS", 0)) # 0 keeps the torch default
+INTEROP_THREADS = int(os.getenv("BERT_INTEROP_THREADS", 0))
+INFERENCE_MODE = os.getenv("BERT_INFERENCE_MODE", "1").lower() in {"1", "true", "yes"}
+
+_threads_configured = False
+
+def configure_threads(num_threads=NUM_THREADS, interop_threads=INTEROP_THREADS):
+    global _threads_configured
+    if _threads_configured:
+        return
+    if num_threads > 0:
+        torch.set_num_threads(num_threads)
+    if interop_threads > 0:
+        # only allowed once, before any inter-op parallel work has started
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError as e:
+            print(f"### Could not set inter-op threads: {e} ###")
+    _threads_configured = True
+
+def load_model(model_path, backend=BACKEND):
+    if backend not in ("fp32", "int8"):
+        raise ValueError(f"Unknown BERT_BACKEND '{backend}', expected 'fp32' or 'int8'.")
+
+    configure_threads()
+    model = AutoModelForSequenceClassification.from_pretrained(model_path)
+    model.eval()
+
+    if backend == "int8":
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    print(f"### Sentiment model loaded (backend={backend}, threads={torch.get_num_threads()}) ###")
+    return model
+
+def _inference_context():
+    return torch.inference_mode() if INFERENCE_MODE else torch.no_grad()
+
+def _length_buckets(encodings, batch_size):
+    # sort by token length so each micro-batch pads to a similar size
+    order = sorted(range(len(encodings)), key=lambda i: len(encodings[i]))
+    for start in range(0, len(order), batch_size):
+        yield order[start:start + batch_size]
+
+def _run_micro_batch(tokenizer, model, input_ids):
+    inputs = tokenizer.pad({"input_ids": input_ids}, padding=True, return_tensors="pt")
+    with _inference_context():
+        outputs = model(**inputs) # model execution
+        probs = softmax(outputs.logits, dim=1) # convert logits to class probabilities using softmax
+        scores, label_idx = torch.max(probs, dim=1)
+    return label_idx.tolist(), scores.tolist()
+
+def analyze_texts(texts, tokenizer, model, batch_size=BATCH_SIZE):
+    # blank texts are skipped, as in the per-text path
+    texts = [text for text in texts if text.strip()]
+    if not texts:
+        return []
+
+    # tokenize the whole request once, padding is applied per micro-batch
+    encodings = tokenizer(texts, truncation=True, max_length=MAX_LENGTH)["input_ids"]
+
+    results = [None] * len(texts)
+    for bucket in _length_buckets(encodings, max(1, batch_size)):
+        label_idx, scores = _run_micro_batch(tokenizer, model, [encodings[i] for i in bucket])
+        for i, idx, score in zip(bucket, label_idx, scores):
+            results[i] = {
+                "label": LABELS[idx],
+                "score": round(score, 3),
+                "review": texts[i]
+            }
+
+    return results
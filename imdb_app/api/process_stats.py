@@ -0,0 +1,35 @@
+import os
+
+def _read_kb_fields(path, fields):
+    values = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                name, _, rest = line.partition(":")
+                if name in fields:
+                    values[name] = int(rest.split()[0])
+    except (OSError, ValueError, IndexError):
+        pass
+    return values
+
+def memory_usage():
+    # linux only: RSS counts shared pages in every worker, PSS splits them between the sharers
+    status = _read_kb_fields("/proc/self/status", {"VmRSS"})
+    rollup = _read_kb_fields("/proc/self/smaps_rollup", {"Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty"})
+
+    def to_mb(kb):
+        return round(kb / 1024, 1) if kb is not None else None
+
+    shared = None
+    private = None
+    if rollup:
+        shared = rollup.get("Shared_Clean", 0) + rollup.get("Shared_Dirty", 0)
+        private = rollup.get("Private_Clean", 0) + rollup.get("Private_Dirty", 0)
+
+    return {
+        "pid": os.getpid(),
+        "rss_mb": to_mb(status.get("VmRSS")),
+        "pss_mb": to_mb(rollup.get("Pss")),
+        "shared_mb": to_mb(shared),
+        "private_mb": to_mb(private)
+    }
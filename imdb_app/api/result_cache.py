@@ -0,0 +1,137 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+import threading
+import hashlib
+import sqlite3
+import json
+import re
+import os
+
+CACHE_SIZE = int(os.getenv("SENTIMENT_CACHE_SIZE", 10000))
+CACHE_PATH = os.getenv("SENTIMENT_CACHE_PATH", "") # empty disables the on-disk tier
+SQLITE_MAX_PARAMS = 500
+
+def model_fingerprint(model_path, backend="fp32"):
+    # model identity: hash of config.json plus the inference backend, so a new model never reads stale results
+    with open(os.path.join(model_path, "config.json"), "rb") as f:
+        digest = hashlib.sha256(f.read())
+    digest.update(backend.encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+def normalize_text(text):
+    return re.sub(r"\s+", " ", text).strip()
+
+class SentimentCache:
+    def __init__(self, model_id, max_size=CACHE_SIZE, path=CACHE_PATH):
+        self.model_id = model_id
+        self.max_size = max(0, int(max_size))
+        self.path = path
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if self.path:
+            self._init_disk()
+
+    def _init_disk(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sentiment_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        # one short-lived connection per call keeps the tier safe across threads and workers
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def key(self, text):
+        payload = f"{self.model_id}\0{normalize_text(text)}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def _remember(self, key, value):
+        if not self.max_size:
+            return
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False) # evict least recently used
+
+    def get_many(self, texts):
+        keys = [self.key(text) for text in texts]
+        found = {}
+
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        if missing and self.path:
+            rows = []
+            try:
+                with self._connect() as conn:
+                    for start in range(0, len(missing), SQLITE_MAX_PARAMS):
+                        chunk = missing[start:start + SQLITE_MAX_PARAMS]
+                        placeholders = ",".join("?" * len(chunk))
+                        rows.extend(conn.execute(
+                            f"SELECT key, value FROM sentiment_cache WHERE key IN ({placeholders})", chunk
+                        ).fetchall())
+            except sqlite3.Error as e:
+                print(f"### Sentiment cache read failed: {e} ###")
+                rows = []
+            with self._lock:
+                for key, value in rows:
+                    found[key] = json.loads(value)
+                    self._remember(key, found[key])
+                self.disk_hits += len(rows)
+
+        with self._lock:
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+
+        return [found.get(key) for key in keys]
+
+    def put_many(self, texts, values):
+        items = [(self.key(text), value) for text, value in zip(texts, values)]
+
+        with self._lock:
+            for key, value in items:
+                self._remember(key, value)
+
+        if self.path and items:
+            try:
+                with self._connect() as conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO sentiment_cache (key, value) VALUES (?, ?)",
+                        [(key, json.dumps(value)) for key, value in items]
+                    )
+            except sqlite3.Error as e:
+                print(f"### Sentiment cache write failed: {e} ###")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "model_id": self.model_id,
+                "size": len(self._memory),
+                "max_size": self.max_size,
+                "persistent": bool(self.path),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0
+            }
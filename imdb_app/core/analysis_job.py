@@ -0,0 +1,87 @@
+from core.job_queue import JobQueue, JOB_WORKERS
+from core.scrape_cache import cached_get_imdb_reviews
+from core.sentiment_analysis import analyze_sentiment_stream
+from core.sentiment_client import get_client
+from core.model_registry import predict_ratings
+from core.incremental import review_dates
+from db.postgre import Postgre
+import threading
+import argparse
+import time
+import os
+
+PROGRESS_EVERY = int(os.getenv("JOB_PROGRESS_EVERY", 50)) # sentiment results between progress writes
+
+def analyze_title(payload, report):
+    # scrape -> sentiment -> rating -> save; the reviews are reported once,
+    # sentiment results in batches as they arrive
+    title_id = payload["title_id"]
+    report(stage="scrape", progress=0.05)
+    reviews, cache_status = cached_get_imdb_reviews(title_id, payload["review_url"])
+    if not reviews:
+        raise ValueError(f"No reviews were found for {title_id}")
+
+    comments = [r["comment"] for r in reviews if r["comment"].strip() and r["comment"].strip().upper() != "N/A"]
+    report(stage="sentiment", progress=0.1, result={"reviews": reviews, "cache_status": cache_status})
+    sentiments = []
+    batch = []
+    for sentiment in analyze_sentiment_stream(comments, title_id):
+        sentiments.append(sentiment)
+        batch.append(sentiment)
+        if len(batch) >= PROGRESS_EVERY:
+            report(progress=0.1 + 0.7 * len(sentiments) / max(len(comments), 1), rows={"sentiment": batch})
+            batch = []
+    report(rows={"sentiment": batch})
+    if not sentiments:
+        raise ValueError("No results returned from the sentiment model")
+
+    report(stage="rating", progress=0.8)
+    rating_results = predict_ratings(reviews)
+
+    report(stage="save", progress=0.9, result={"rating_results": rating_results})
+    try:
+        with Postgre() as db:
+            db.save_rating_results(
+                payload.get("title") or title_id,
+                rating_results,
+                title_id=title_id,
+                model_version=rating_results[0]["model_version"] if rating_results else None,
+                sentiments=sentiments,
+                sentiment_model=get_client().model_version,
+                review_dates=review_dates(reviews)
+            )
+        return {"saved": True}
+    except Exception as e:
+        # the analysis itself is still shown
+        print(f"### Error saving job results for {title_id}: {e} ###")
+        return {"saved": False, "save_error": str(e)}
+
+_queue = None
+_queue_lock = threading.Lock()
+
+def get_analysis_queue(workers=JOB_WORKERS):
+    # one queue (and worker pool) per process
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue(analyze_title, workers=workers)
+            _queue.start()
+        return _queue
+
+def submit_analysis(title_id, title, review_url):
+    return get_analysis_queue().submit(title_id, {"title_id": title_id, "title": title, "review_url": review_url})
+
+if __name__ == "__main__":
+    # usage: python -m core.analysis_job [--workers 2]
+    # standalone worker process; the dashboard can then run with JOB_WORKERS=0
+    parser = argparse.ArgumentParser(description="Run analysis job workers.")
+    parser.add_argument("--workers", type=int, default=max(JOB_WORKERS, 1))
+    args = parser.parse_args()
+
+    queue = get_analysis_queue(args.workers)
+    print(f"### {args.workers} analysis workers waiting for jobs ###")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        queue.stop()
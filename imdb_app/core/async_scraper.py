@@ -0,0 +1,203 @@
+from core.http_scraper import build_session, request_html, next_review_page, HTTP_MAX_PAGES, HTTP_TIMEOUT
+from core.imdb_scraper import parse_reviews_html, has_more_reviews, search_imdb_titles, get_imdb_reviews_selenium
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import argparse
+import requests
+import asyncio
+import random
+import time
+import os
+
+BASE_URL = os.getenv("IMDB_BASE_URL", "https://www.imdb.com")
+CONCURRENCY = int(os.getenv("ASYNC_SCRAPER_CONCURRENCY", 8)) # requests in flight at once
+RATE_LIMIT = float(os.getenv("ASYNC_SCRAPER_RATE", 2)) # requests per second, per host
+BURST = int(os.getenv("ASYNC_SCRAPER_BURST", 4))
+MAX_RETRIES = int(os.getenv("ASYNC_SCRAPER_MAX_RETRIES", 3))
+BACKOFF = float(os.getenv("ASYNC_SCRAPER_BACKOFF", 0.5)) # seconds, doubled on every retry
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.waited = 0.0
+        self._lock = asyncio.Lock() # waiters are served in arrival order
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+                self.waited += delay
+                await asyncio.sleep(delay)
+
+class HostRateLimiter:
+    def __init__(self, rate=RATE_LIMIT, burst=BURST):
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}
+
+    async def acquire(self, url):
+        host = urlparse(url).netloc
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(self.rate, self.burst)
+        await self.buckets[host].acquire()
+
+def _is_retryable(error):
+    if isinstance(error, (requests.Timeout, requests.ConnectionError)):
+        return True
+    response = getattr(error, "response", None)
+    return response is not None and response.status_code in RETRYABLE_STATUS
+
+class AsyncScraper:
+    # blocking fetchers run in worker threads; the event loop only schedules, throttles and retries
+    def __init__(self, concurrency=CONCURRENCY, rate=RATE_LIMIT, burst=BURST, max_retries=MAX_RETRIES,
+                 backoff=BACKOFF, base_url=BASE_URL, timeout=HTTP_TIMEOUT, browser_fallback=get_imdb_reviews_selenium):
+        self.concurrency = max(1, int(concurrency))
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.limiter = HostRateLimiter(rate, burst)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        # callable(url) -> reviews, for pages whose pagination only works in a browser
+        self.browser_fallback = browser_fallback
+        # retries are done here, with rate limiting and jitter, not inside urllib3
+        self.session = build_session(retry=0, pool_size=self.concurrency)
+        self.stats = {"requests": 0, "retries": 0, "failures": 0, "browser_fallbacks": 0}
+
+    async def fetch(self, url, params=None):
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self.semaphore:
+                    # the token is taken once a slot is free: tasks queued on the semaphore
+                    # cannot hold tokens and then send them all at once
+                    await self.limiter.acquire(url)
+                    self.stats["requests"] += 1
+                    return await asyncio.to_thread(request_html, url, params, self.session, self.timeout)
+            except requests.RequestException as e:
+                if not _is_retryable(e) or attempt == self.max_retries:
+                    self.stats["failures"] += 1
+                    raise
+                self.stats["retries"] += 1
+                # exponential backoff with full jitter, so retries of many tasks do not line up
+                await asyncio.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+
+    async def reviews(self, title_id, max_pages=HTTP_MAX_PAGES):
+        url = f"{self.base_url}/title/{title_id}/reviews/"
+        reviews = []
+        seen_reviews = set()
+        html = await self.fetch(url)
+        pages = 0
+        while html:
+            # parsing is CPU work, keep it off the event loop
+            for review in await asyncio.to_thread(parse_reviews_html, html):
+                key = (review["title"], review["comment"], review["rating"], review["date"])
+                if key not in seen_reviews:
+                    seen_reviews.add(key)
+                    reviews.append(review)
+            pages += 1
+            next_url, params = next_review_page(html, url)
+            if not next_url:
+                # same rule as get_imdb_reviews_http: the end of the legacy page chain, or a
+                # current-markup page with every review; otherwise the browser loads the rest
+                if pages > 1 or not await asyncio.to_thread(has_more_reviews, html):
+                    return reviews
+                break
+            if pages >= max_pages:
+                return reviews
+            html = await self.fetch(next_url, params)
+        return await self._browser_reviews(url)
+
+    async def _browser_reviews(self, url):
+        # one rate-limited page load, bounded further by the driver pool
+        await self.limiter.acquire(url)
+        self.stats["requests"] += 1
+        self.stats["browser_fallbacks"] += 1
+        return await asyncio.to_thread(self.browser_fallback, url)
+
+    async def search(self, query):
+        # search needs a browser: one rate-limited request, bounded further by the driver pool
+        await self.limiter.acquire(self.base_url)
+        self.stats["requests"] += 1
+        return await asyncio.to_thread(search_imdb_titles, query)
+
+    async def _gather(self, keys, make_task, timeout):
+        tasks = {key: asyncio.create_task(make_task(key)) for key in dict.fromkeys(keys)}
+        try:
+            done = await asyncio.wait_for(asyncio.gather(*tasks.values(), return_exceptions=True), timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            # cancelling stops every pending fetch; requests already in a thread end within their timeout
+            for task in tasks.values():
+                task.cancel()
+            raise
+        results = {}
+        for key, result in zip(tasks, done):
+            if isinstance(result, Exception):
+                print(f"### Async scrape failed for {key}: {result} ###")
+                result = None
+            results[key] = result
+        return results
+
+    async def reviews_many(self, title_ids, max_pages=HTTP_MAX_PAGES, timeout=None):
+        # {title_id: reviews}, None for titles that failed
+        return await self._gather(title_ids, lambda title_id: self.reviews(title_id, max_pages), timeout)
+
+    async def search_many(self, queries, timeout=None):
+        return await self._gather(queries, self.search, timeout)
+
+    def report(self):
+        return {
+            **self.stats,
+            "throttled_seconds": round(sum(bucket.waited for bucket in self.limiter.buckets.values()), 2)
+        }
+
+    def close(self):
+        self.session.close()
+
+def scrape_reviews(title_ids, timeout=None, **options):
+    # synchronous entry point; Ctrl+C cancels every pending task
+    async def _run():
+        scraper = AsyncScraper(**options)
+        # to_thread shares the default executor: give it a thread per allowed request, plus parsing
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=scraper.concurrency + 4))
+        try:
+            started = time.monotonic()
+            results = await scraper.reviews_many(title_ids, timeout=timeout)
+            report = {**scraper.report(), "wall_seconds": round(time.monotonic() - started, 2)}
+            return results, report
+        finally:
+            scraper.close()
+    return asyncio.run(_run())
+
+if __name__ == "__main__":
+    # usage: python -m core.async_scraper tt0111161 tt0068646 [--concurrency 8] [--rate 2]
+    parser = argparse.ArgumentParser(description="Scrape the reviews of many titles concurrently.")
+    parser.add_argument("title_ids", nargs="+")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=RATE_LIMIT, help="requests per second per host")
+    parser.add_argument("--burst", type=int, default=BURST)
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--timeout", type=float, help="overall time budget in seconds")
+    args = parser.parse_args()
+
+    results, report = scrape_reviews(
+        args.title_ids,
+        timeout=args.timeout,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        burst=args.burst,
+        base_url=args.base_url
+    )
+    for title_id, reviews in results.items():
+        print(f"### {title_id}: {'failed' if reviews is None else len(reviews)} reviews ###")
+    print(f"### {report} ###")
@@ -0,0 +1,137 @@
+from core.async_scraper import scrape_reviews
+from core.parser_benchmark import synthetic_review_page
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import threading
+import argparse
+import time
+import re
+
+class StubImdb(BaseHTTPRequestHandler):
+    # fake review pages with latency, pagination and a share of 503 answers;
+    # current_titles get the current markup with a see-more button, single_titles
+    # the current markup with every review on the one page
+    pages = 3
+    reviews_per_page = 20
+    latency = 0.1
+    fail_every = 7 # every Nth request answers 503
+    requests = []
+    current_titles = set()
+    single_titles = set()
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            self.requests.append(time.monotonic())
+            count = len(self.requests)
+        time.sleep(self.latency)
+        if self.fail_every and count % self.fail_every == 0:
+            self.send_response(503)
+            self.end_headers()
+            return
+
+        parsed = urlparse(self.path)
+        match = re.match(r"/title/(tt\d+)/reviews/(_ajax)?$", parsed.path)
+        if not match:
+            self.send_response(404)
+            self.end_headers()
+            return
+        page = int(parse_qs(parsed.query).get("paginationKey", ["0"])[0])
+        body = synthetic_review_page(self.reviews_per_page, seed=page)
+        # titles and texts are unique per page so nothing is deduplicated away
+        body = body.replace(">Review ", f">{match.group(1)} p{page} review ")
+        if match.group(1) in self.current_titles:
+            body = body.replace("</section>", '<button class="ipc-see-more__button">All</button></section>')
+        elif page + 1 < self.pages and match.group(1) not in self.single_titles:
+            body = body.replace(
+                "</section>",
+                f'<div class="load-more-data" data-key="{page + 1}" data-ajaxurl="/title/{match.group(1)}/reviews/_ajax"></div></section>'
+            )
+        payload = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+def _max_per_second(timestamps):
+    # most requests seen in any one-second window
+    timestamps = sorted(timestamps)
+    best = 0
+    start = 0
+    for end, ts in enumerate(timestamps):
+        while ts - timestamps[start] >= 1.0:
+            start += 1
+        best = max(best, end - start + 1)
+    return best
+
+def run_check(titles=12, concurrencies=(1, 4, 16), rate=20.0, burst=4, current=2, single=2):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubImdb)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    title_ids = [f"tt{i:07d}" for i in range(1, titles + 1)]
+    StubImdb.current_titles = set(title_ids[titles - current:])
+    StubImdb.single_titles = set(title_ids[titles - current - single:titles - current])
+    expected = StubImdb.pages * StubImdb.reviews_per_page
+    expected_by_title = {
+        title_id: StubImdb.reviews_per_page if title_id in StubImdb.single_titles else expected
+        for title_id in title_ids
+    }
+
+    def browser_fallback(url):
+        # stands in for Selenium, which would load every page behind the see-more button
+        return [{"title": f"{url} review {i}", "comment": "", "rating": None, "date": "N/A"} for i in range(expected)]
+
+    report = []
+    try:
+        for concurrency in concurrencies:
+            StubImdb.requests = []
+            results, stats = scrape_reviews(
+                title_ids, concurrency=concurrency, rate=rate, burst=burst, base_url=base_url, backoff=0.05,
+                browser_fallback=browser_fallback
+            )
+            complete = sum(1 for title_id, reviews in results.items() if reviews and len(reviews) == expected_by_title[title_id])
+            report.append({
+                "concurrency": concurrency,
+                "complete_titles": complete,
+                "wall_seconds": stats["wall_seconds"],
+                "requests": stats["requests"],
+                "retries": stats["retries"],
+                "browser_fallbacks": stats["browser_fallbacks"],
+                "observed_rps": round(len(StubImdb.requests) / max(stats["wall_seconds"], 1e-6), 1),
+                "max_per_second": _max_per_second(StubImdb.requests)
+            })
+            print(f"### {report[-1]} ###")
+    finally:
+        server.shutdown()
+    return report
+
+if __name__ == "__main__":
+    # usage: python -m core.async_scraper_check [--titles 12] [--current 2] [--single 2] [--rate 20]
+    parser = argparse.ArgumentParser(description="Run the async scraper against a local stub IMDb server.")
+    parser.add_argument("--titles", type=int, default=12)
+    parser.add_argument("--current", type=int, default=2, help="titles served in the current markup, more reviews behind the see-more button")
+    parser.add_argument("--single", type=int, default=2, help="titles served in the current markup, all reviews on one page")
+    parser.add_argument("--rate", type=float, default=20.0)
+    parser.add_argument("--burst", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+
+    report = run_check(args.titles, args.concurrency, args.rate, args.burst, args.current, args.single)
+    failed = False
+    for entry in report:
+        if entry["complete_titles"] != args.titles:
+            print(f"### Concurrency {entry['concurrency']}: only {entry['complete_titles']}/{args.titles} titles complete ###")
+            failed = True
+        if entry["browser_fallbacks"] != args.current:
+            print(f"### Concurrency {entry['concurrency']}: {entry['browser_fallbacks']} browser fallbacks, {args.current} expected ###")
+            failed = True
+        # a full bucket can add its burst on top of the steady rate in one window
+        if entry["max_per_second"] > args.rate + args.burst:
+            print(f"### Concurrency {entry['concurrency']}: {entry['max_per_second']} requests in one second ###")
+            failed = True
+    if failed:
+        raise SystemExit(1)
@@ -0,0 +1,221 @@
+from core.imdb_scraper import get_imdb_reviews, build_imdb_reviews_url
+from core.sentiment_analysis import analyze_sentiment
+from core.sentiment_client import get_client
+from core.model_registry import predict_ratings
+from core.incremental import get_new_imdb_reviews, advance_watermark, review_dates
+from db.postgre import Postgre
+from db.pool import get_pool
+import threading
+import argparse
+import queue
+import time
+import os
+import re
+
+SCRAPE_WORKERS = int(os.getenv("PIPELINE_SCRAPE_WORKERS", 4))
+SENTIMENT_WORKERS = int(os.getenv("PIPELINE_SENTIMENT_WORKERS", 2))
+RATING_WORKERS = int(os.getenv("PIPELINE_RATING_WORKERS", 2))
+QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", 4)) # items buffered between stages (backpressure)
+
+_DONE = object()
+
+class Stage:
+    def __init__(self, name, func, workers):
+        self.name = name
+        self.func = func
+        self.workers = max(1, int(workers))
+        self.items = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def _work(self, inbox, outbox):
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                return
+            started = time.monotonic()
+            try:
+                result = self.func(item)
+            except Exception as e:
+                print(f"### Pipeline stage '{self.name}' failed for {item.get('title_id')}: {e} ###")
+                result = None
+            elapsed = time.monotonic() - started
+            with self._lock:
+                self.busy_seconds += elapsed
+                if result is None:
+                    self.errors += 1
+                else:
+                    self.items += 1
+            if result is not None and outbox is not None:
+                outbox.put(result) # blocks while the next stage is saturated
+
+    def start(self, inbox, outbox):
+        self.started = time.monotonic()
+        threads = [
+            threading.Thread(target=self._work, args=(inbox, outbox), name=f"pipeline-{self.name}-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def report(self):
+        wall = (self.finished or time.monotonic()) - (self.started or time.monotonic())
+        processed = self.items + self.errors
+        return {
+            "stage": self.name,
+            "workers": self.workers,
+            "items": self.items,
+            "errors": self.errors,
+            "wall_seconds": round(wall, 2),
+            "items_per_second": round(self.items / wall, 3) if wall > 0 else 0.0,
+            "avg_item_seconds": round(self.busy_seconds / processed, 2) if processed else 0.0,
+            "utilization": round(self.busy_seconds / (wall * self.workers), 2) if wall > 0 else 0.0
+        }
+
+def _scrape(item):
+    url = build_imdb_reviews_url(f"https://www.imdb.com/title/{item['title_id']}/")
+    reviews = get_imdb_reviews(url)
+    if not reviews:
+        print(f"### No reviews found for {item['title_id']} ###")
+        return None
+    return {**item, "reviews": reviews}
+
+def _scrape_incremental(item):
+    with Postgre() as db:
+        watermark = db.get_watermark(item["title_id"])
+    reviews = get_new_imdb_reviews(item["title_id"], watermark)
+    if not reviews:
+        print(f"### No new reviews for {item['title_id']} ###")
+        return None
+    return {**item, "reviews": reviews, "watermark": watermark}
+
+def _analyze(item):
+    comments = [r["comment"] for r in item["reviews"] if r["comment"].strip() and r["comment"].strip().upper() != "N/A"]
+    return {**item, "sentiment": analyze_sentiment(comments, item["title_id"])}
+
+def _predict_and_save(item):
+    rating_results = predict_ratings(item["reviews"])
+    with Postgre() as db:
+        if rating_results or item["sentiment"]:
+            db.save_rating_results(
+                item.get("title"), # None keeps the name already stored for this title
+                rating_results,
+                title_id=item["title_id"],
+                model_version=rating_results[0]["model_version"] if rating_results else None,
+                sentiments=item["sentiment"],
+                sentiment_model=get_client().model_version,
+                review_dates=review_dates(item["reviews"])
+            )
+        if "watermark" in item:
+            # advance the high-water mark only once the delta is stored
+            db.save_watermark(item["title_id"], advance_watermark(item["watermark"], item["reviews"]))
+    return {**item, "rating_results": rating_results or []}
+
+def build_stages(scrape_workers=SCRAPE_WORKERS, sentiment_workers=SENTIMENT_WORKERS, rating_workers=RATING_WORKERS, incremental=False):
+    return [
+        Stage("scrape", _scrape_incremental if incremental else _scrape, scrape_workers),
+        Stage("sentiment", _analyze, sentiment_workers),
+        Stage("rating+db", _predict_and_save, rating_workers)
+    ]
+
+def run_pipeline(title_ids, stages=None, queue_size=QUEUE_SIZE):
+    # title_ids: IMDb title IDs, or a {title_id: title} mapping when the names are known
+    titles = title_ids if isinstance(title_ids, dict) else dict.fromkeys(title_ids)
+    stages = stages or build_stages()
+    queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+    results = []
+    results_lock = threading.Lock()
+
+    # the last stage collects its output instead of forwarding it
+    collector = queue.Queue()
+    started = time.monotonic()
+
+    stage_threads = []
+    for i, stage in enumerate(stages):
+        outbox = queues[i + 1] if i + 1 < len(stages) else collector
+        stage_threads.append(stage.start(queues[i], outbox))
+
+    def _drain():
+        while True:
+            item = collector.get()
+            if item is _DONE:
+                return
+            with results_lock:
+                results.append(item)
+
+    drainer = threading.Thread(target=_drain, name="pipeline-collector", daemon=True)
+    drainer.start()
+
+    for title_id, title in titles.items():
+        queues[0].put({"title_id": title_id, "title": title})
+
+    # shut the stages down in order: once a stage has drained, signal the next one
+    for i, stage in enumerate(stages):
+        for _ in range(stage.workers):
+            queues[i].put(_DONE)
+        for thread in stage_threads[i]:
+            thread.join()
+        stage.finished = time.monotonic()
+    collector.put(_DONE)
+    drainer.join()
+
+    report = {
+        "titles": len(titles),
+        "completed": len(results),
+        "wall_seconds": round(time.monotonic() - started, 2),
+        "stages": [stage.report() for stage in stages],
+        "db_pool": get_pool().metrics()
+    }
+    return results, report
+
+def print_report(report):
+    print(f"### Pipeline finished: {report['completed']}/{report['titles']} titles in {report['wall_seconds']}s ###")
+    header = f"{'stage':<12}{'workers':>8}{'items':>8}{'errors':>8}{'items/s':>10}{'avg s':>8}{'util':>7}"
+    print(header)
+    print("-" * len(header))
+    for s in report["stages"]:
+        print(f"{s['stage']:<12}{s['workers']:>8}{s['items']:>8}{s['errors']:>8}{s['items_per_second']:>10}{s['avg_item_seconds']:>8}{s['utilization']:>7}")
+    print(f"### DB pool: {report['db_pool']} ###")
+
+def _read_titles(values, path=None):
+    # "tt0111161" or "tt0111161=The Shawshank Redemption" on the command line,
+    # "tt0111161 The Shawshank Redemption" per line in the file
+    entries = [value.partition("=")[::2] for value in values]
+    if path:
+        with open(path) as f:
+            entries.extend(line.strip().partition(" ")[::2] for line in f if line.strip())
+    titles = {}
+    for title_id, title in entries:
+        title_id = title_id.strip()
+        if not re.fullmatch(r"tt\d+", title_id):
+            print(f"### Skipping invalid IMDb title ID: {title_id} ###")
+            continue
+        titles[title_id] = title.strip() or titles.get(title_id)
+    return titles
+
+if __name__ == "__main__":
+    # usage: python -m core.batch_pipeline tt0111161 "tt0068646=The Godfather" [--file watchlist.txt]
+    parser = argparse.ArgumentParser(description="Scrape, analyze and store many IMDb titles.")
+    parser.add_argument("title_ids", nargs="*", help="IMDb title IDs (tt...), optionally as tt...=Title")
+    parser.add_argument("--file", help="file with one title ID per line, optionally followed by the title")
+    parser.add_argument("--scrape-workers", type=int, default=SCRAPE_WORKERS)
+    parser.add_argument("--sentiment-workers", type=int, default=SENTIMENT_WORKERS)
+    parser.add_argument("--rating-workers", type=int, default=RATING_WORKERS)
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE)
+    parser.add_argument("--incremental", action="store_true", help="only fetch reviews newer than the last harvest")
+    args = parser.parse_args()
+
+    titles = _read_titles(args.title_ids, args.file)
+    if not titles:
+        parser.error("no valid title IDs given")
+
+    _, pipeline_report = run_pipeline(
+        titles,
+        stages=build_stages(args.scrape_workers, args.sentiment_workers, args.rating_workers, args.incremental),
+        queue_size=args.queue_size
+    )
+    print_report(pipeline_report)
@@ -0,0 +1,175 @@
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+from contextlib import contextmanager
+import threading
+import tempfile
+import shutil
+import atexit
+import time
+import os
+
+POOL_SIZE = int(os.getenv("SELENIUM_POOL_SIZE", 2))
+MAX_USES = int(os.getenv("SELENIUM_MAX_USES", 20)) # recycle a browser after N scrapes
+ACQUIRE_TIMEOUT = float(os.getenv("SELENIUM_ACQUIRE_TIMEOUT", 180))
+
+class PooledDriver:
+    def __init__(self, driver, profile_dir):
+        self.driver = driver
+        self.profile_dir = profile_dir
+        self.uses = 0
+        self.created_at = time.monotonic()
+
+class WebDriverPool:
+    def __init__(self, options_factory, max_size=POOL_SIZE, max_uses=MAX_USES, acquire_timeout=ACQUIRE_TIMEOUT):
+        # options_factory: callable(profile_dir) -> selenium ChromeOptions
+        self.options_factory = options_factory
+        self.max_size = max(1, int(max_size))
+        self.max_uses = max(1, int(max_uses))
+        self.acquire_timeout = acquire_timeout
+        self._idle = []
+        self._created = 0
+        self._cond = threading.Condition()
+        self._driver_path = None
+        self._driver_path_lock = threading.Lock()
+        self._closed = False
+        self.stats = {"created": 0, "recycled": 0, "unhealthy": 0, "checkouts": 0}
+
+    def _get_driver_path(self):
+        # download/resolve chromedriver once per process, not once per scrape
+        with self._driver_path_lock:
+            if self._driver_path is None:
+                self._driver_path = ChromeDriverManager().install()
+            return self._driver_path
+
+    def _create(self):
+        profile_dir = tempfile.mkdtemp(prefix="chrome-user-data-")
+        try:
+            driver = webdriver.Chrome(
+                service=Service(self._get_driver_path()),
+                options=self.options_factory(profile_dir)
+            )
+        except Exception:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+            raise
+        self._count("created")
+        return PooledDriver(driver, profile_dir)
+
+    def _count(self, name):
+        # checkouts and releases run concurrently, keep the counters under the lock
+        with self._cond:
+            self.stats[name] += 1
+
+    def _destroy(self, pooled):
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            print(f"### Error while closing browser: {e} ###")
+        shutil.rmtree(pooled.profile_dir, ignore_errors=True)
+
+    def _is_healthy(self, pooled):
+        try:
+            pooled.driver.execute_script("return 1;")
+            return True
+        except Exception:
+            return False
+
+    def _acquire(self):
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("WebDriver pool is closed.")
+                if self._idle:
+                    pooled = self._idle.pop()
+                    break
+                if self._created < self.max_size:
+                    # reserve the slot, the browser itself is started outside the lock
+                    self._created += 1
+                    pooled = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("Timed out waiting for a free browser.")
+                self._cond.wait(remaining)
+
+        if pooled is not None:
+            if self._is_healthy(pooled):
+                return pooled
+            self._count("unhealthy")
+            self._destroy(pooled)
+
+        try:
+            return self._create()
+        except Exception:
+            self._release_slot()
+            raise
+
+    def _release_slot(self):
+        with self._cond:
+            self._created -= 1
+            self._cond.notify()
+
+    def _release(self, pooled, discard=False):
+        pooled.uses += 1
+        if discard or pooled.uses >= self.max_uses or self._closed:
+            self._count("recycled")
+            self._destroy(pooled)
+            self._release_slot()
+            return
+
+        try:
+            # leave the browser on a blank page so the next user starts clean
+            pooled.driver.get("about:blank")
+        except Exception:
+            self._count("unhealthy")
+            self._destroy(pooled)
+            self._release_slot()
+            return
+
+        with self._cond:
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    @contextmanager
+    def driver(self):
+        pooled = self._acquire()
+        self._count("checkouts")
+        try:
+            yield pooled.driver
+        except Exception:
+            # the browser may be in an unknown state, do not hand it out again
+            self._release(pooled, discard=True)
+            raise
+        else:
+            self._release(pooled)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+            self._cond.notify_all()
+        for pooled in idle:
+            self._destroy(pooled)
+
+    def metrics(self):
+        with self._cond:
+            return {
+                "max_size": self.max_size,
+                "open": self._created,
+                "idle": len(self._idle),
+                **self.stats
+            }
+
+_pools = []
+
+@atexit.register
+def _close_pools():
+    for pool in _pools:
+        pool.close()
+
+def create_driver_pool(options_factory, **kwargs):
+    pool = WebDriverPool(options_factory, **kwargs)
+    _pools.append(pool)
+    return pool
@@ -0,0 +1,68 @@
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib.parse import urljoin
+import threading
+import requests
+import html as html_lib
+import re
+import os
+
+HTTP_SCRAPER_ENABLED = os.getenv("IMDB_HTTP_SCRAPER", "1").lower() in {"1", "true", "yes"}
+HTTP_TIMEOUT = float(os.getenv("IMDB_HTTP_TIMEOUT", 15))
+HTTP_MAX_PAGES = int(os.getenv("IMDB_HTTP_MAX_PAGES", 40))
+HTTP_POOL_SIZE = int(os.getenv("IMDB_HTTP_POOL_SIZE", 8))
+
+HEADERS = {
+    # same user-agent as the Selenium browser
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9"
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    # one pooled session per process, shared by every HTTP scrape
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = build_session(Retry(total=2, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504)))
+        return _session
+
+def build_session(retry=0, pool_size=HTTP_POOL_SIZE):
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def request_html(url, params=None, session=None, timeout=HTTP_TIMEOUT):
+    # raises on network errors and non-2xx answers, for callers with their own retry policy
+    response = (session or get_session()).get(url, params=params, timeout=timeout)
+    response.raise_for_status()
+    return response.text
+
+def fetch_html(url, params=None):
+    try:
+        return request_html(url, params)
+    except requests.RequestException as e:
+        print(f"### HTTP fetch failed for {url}: {e} ###")
+        return None
+
+LOAD_MORE_TAG = re.compile(r"<div[^>]*\bload-more-data\b[^>]*>")
+TAG_ATTRIBUTE = re.compile(r'([\w-]+)="([^"]*)"')
+
+def next_review_page(html, base_url):
+    # legacy review markup: <div class="load-more-data" data-key="..." data-ajaxurl="...">
+    # matched with a regex so the page is not parsed twice
+    match = LOAD_MORE_TAG.search(html)
+    if not match:
+        return None, None
+    attributes = {name: html_lib.unescape(value) for name, value in TAG_ATTRIBUTE.findall(match.group(0))}
+    key = attributes.get("data-key")
+    if not key:
+        return None, None
+    ajax_url = attributes.get("data-ajaxurl") or base_url.rstrip("/") + "/_ajax"
+    return urljoin(base_url, ajax_url), {"paginationKey": key}
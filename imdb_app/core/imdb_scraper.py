@@ -1,33 +1,73 @@
-from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, ElementClickInterceptedException, InvalidArgumentException
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import TimeoutException, ElementClickInterceptedException, InvalidArgumentException, StaleElementReferenceException
 from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
+from core.driver_pool import create_driver_pool
+from core.http_scraper import fetch_html, next_review_page, HTTP_SCRAPER_ENABLED, HTTP_MAX_PAGES
 from urllib.parse import quote_plus, urljoin, urlparse
 import re
 import os
 import json
 import time
 import uuid
+
+REVIEW_CSS = "article.user-review-item, div.review-container, div.lister-item.mode-detail.imdb-user-review, [data-testid='review-container']"
+LOAD_MORE_CSS = "button.ipc-see-more__button"
+REVIEW_TARGET = int(os.getenv("IMDB_REVIEW_TARGET", 0)) # 0 loads every review IMDb will serve
+PAGINATION_STALL_TIMEOUT = float(os.getenv("IMDB_PAGINATION_STALL_TIMEOUT", 6))
+PAGINATION_MAX_SECONDS = float(os.getenv("IMDB_PAGINATION_MAX_SECONDS", 300))
+HTML_PARSER = os.getenv("IMDB_HTML_PARSER", "lxml") # lxml | soup
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+# XPath versions of REVIEW_CSS and of the per-review selectors, compiled once;
+# a union of paths returns its first match in document order, like select_one
+REVIEW_XPATH = etree.XPath(
+    f"//article[{_has_class('user-review-item')}]"
+    f" | //div[{_has_class('review-container')}]"
+    f" | //div[{_has_class('lister-item')} and {_has_class('mode-detail')} and {_has_class('imdb-user-review')}]"
+    " | //*[@data-testid='review-container']"
+)
+REVIEW_TITLE_XPATH = etree.XPath(f"(.//h3[{_has_class('ipc-title__text')}] | .//a[{_has_class('title')}])[1]")
+REVIEW_COMMENT_XPATH = etree.XPath(
+    f"(.//div[{_has_class('ipc-html-content-inner-div')}]"
+    " | .//*[@data-testid='review-overflow']"
+    f" | .//div[{_has_class('text')} and {_has_class('show-more__control')}])[1]"
+)
+REVIEW_RATING_XPATH = etree.XPath(
+    f"(.//span[{_has_class('ipc-rating-star--rating')}]"
+    f" | .//span[{_has_class('ipc-rating-star')}]"
+    f" | .//span[{_has_class('rating-other-user-rating')}]//span)[1]"
+)
+REVIEW_DATE_XPATH = etree.XPath(
+    f"(.//li[{_has_class('ipc-inline-list__item')} and {_has_class('review-date')}]"
+    f" | .//span[{_has_class('review-date')}])[1]"
+)
+LOAD_MORE_XPATH = etree.XPath(f"//button[{_has_class('ipc-see-more__button')}]")
+TEXT_XPATH = etree.XPath(".//text()")
+JSON_LD_XPATH = etree.XPath("//script[@type='application/ld+json']")
 
-def get_selenium_options():
+def get_selenium_options(profile_dir=None):
     options = Options()
     ## options for docker
     if os.getenv("SELENIUM_HEADLESS", "1").lower() in {"1", "true", "yes"}:
         options.add_argument("--headless=new")  # simulates normal visual rendering
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
-    options.add_argument(f"--user-data-dir=/tmp/chrome-user-data-{uuid.uuid4().hex}")
+    options.add_argument(f"--user-data-dir={profile_dir or f'/tmp/chrome-user-data-{uuid.uuid4().hex}'}")
     ##
     options.add_argument("--disable-gpu") # help prevent graphical glitches
     options.add_argument("--window-size=1920,1080")
     # set a common user-agent to avoid being detected as a bot/scraper
     options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36")
     return options
+
+# warm browsers shared by every scrape (and every dashboard session) in this process
+driver_pool = create_driver_pool(get_selenium_options)
 
 def _is_valid_http_url(url):
     if not isinstance(url, str):
@@ -123,13 +163,17 @@ def _pick_title_anchor(item):
     return candidates[0]
 
 def _extract_reviews_from_json_ld(soup):
+    scripts = soup.select("script[type='application/ld+json']")
+    return _reviews_from_json_ld((script.string or script.get_text() or "") for script in scripts)
+
+def _reviews_from_json_ld(raw_scripts):
     extracted = []
     seen = set()
-    scripts = soup.select("script[type='application/ld+json']")
 
-    for script in scripts:
-        raw = (script.string or script.get_text() or "").strip()
-        if not raw:
+    for raw in raw_scripts:
+        raw = raw.strip()
+        # only decode the payloads that can carry reviews
+        if not raw or '"review"' not in raw:
             continue
 
         try:
@@ -180,10 +224,12 @@ def _extract_reviews_from_json_ld(soup):
 
     return extracted
 
-def build_imdb_reviews_url(title_url):
+def build_imdb_reviews_url(title_url, newest_first=False):
     title_id = _extract_imdb_title_id(title_url)
     if not title_id:
         return None
+    if newest_first:
+        return f"https://www.imdb.com/title/{title_id}/reviews/?sort=submissionDate&dir=desc"
     return f"https://www.imdb.com/title/{title_id}/reviews/"
 
 def _try_click_cookie_banner(driver, timeout=3):
@@ -233,19 +279,76 @@ def _try_click_cookie_banner(driver, timeout=3):
 
     return False
 
-def get_imdb_reviews(url):
-    if not _is_valid_http_url(url):
-        print(f"### Invalid reviews URL: {url} ###")
-        return []
-
-    options = get_selenium_options()
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+def _count_reviews(driver):
+    return len(driver.find_elements(By.CSS_SELECTOR, REVIEW_CSS))
+
+def _trigger_load_more(driver):
+    try:
+        buttons = [b for b in driver.find_elements(By.CSS_SELECTOR, LOAD_MORE_CSS) if b.is_displayed()]
+        if buttons:
+            # the second button is "All", the first one loads a single page
+            button = buttons[1] if len(buttons) > 1 else buttons[0]
+            driver.execute_script("arguments[0].scrollIntoView({block: 'center'}); arguments[0].click();", button)
+        # lazy-loaded lists grow on scroll as well
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+    except (StaleElementReferenceException, ElementClickInterceptedException) as e:
+        print(f"### Load-more click skipped: {type(e).__name__} ###")
+
+def _last_review_on_page(driver):
+    # date of the last loaded review container, read in the browser without parsing the page
+    date_text = driver.execute_script(
+        "const items = document.querySelectorAll(arguments[0]);"
+        "const last = items[items.length - 1];"
+        "const date = last && last.querySelector('li.review-date, span.review-date');"
+        "return date ? date.textContent.trim() : null;",
+        REVIEW_CSS
+    )
+    return {"title": None, "comment": None, "rating": None, "date": date_text or "N/A"}
+
+def paginate_reviews(driver, target=REVIEW_TARGET, stall_timeout=PAGINATION_STALL_TIMEOUT, max_seconds=PAGINATION_MAX_SECONDS, stop_at=None):
+    # keep loading until the review count stops growing, reaches the target or time runs out
+    # stop_at: optional callable(review) -> bool, checked against the last loaded review
+    started = time.monotonic()
+    initial = count = _count_reviews(driver)
+    rounds = 0
+
+    while not target or count < target:
+        if time.monotonic() - started > max_seconds:
+            print("### Pagination time budget exhausted. ###")
+            break
+        if stop_at and stop_at(_last_review_on_page(driver)):
+            print("### Reached already harvested reviews, stopping pagination. ###")
+            break
+
+        _trigger_load_more(driver)
+        rounds += 1
+        previous = count
+        try:
+            WebDriverWait(driver, stall_timeout, poll_frequency=0.25).until(
+                lambda d: _count_reviews(d) > previous
+            )
+        except TimeoutException:
+            break # no growth: everything reachable is loaded
+        count = _count_reviews(driver)
+
+    elapsed = time.monotonic() - started
+    loaded = count - initial
+    stats = {
+        "reviews": count,
+        "loaded": loaded,
+        "rounds": rounds,
+        "seconds": round(elapsed, 2),
+        "reviews_per_second": round(loaded / elapsed, 1) if elapsed > 0 else 0.0
+    }
+    print(f"### Pagination: {count} reviews ({loaded} loaded in {stats['seconds']}s, {stats['reviews_per_second']} reviews/s, {rounds} rounds) ###")
+    return stats
+
+def _load_reviews_page(driver, url, max_reviews=REVIEW_TARGET, stop_at=None):
     try:
         driver.get(url)
     except InvalidArgumentException:
         print(f"### Selenium rejected URL: {url} ###")
-        driver.quit()
-        return []
+        return None
 
     try:
         # wait until the page is fully loaded (presence of <body> tag)
@@ -259,53 +362,87 @@ def get_imdb_reviews(url):
         else:
             print("### Cookie banner not present or already accepted. ###")
 
-        print("### Attempting to click the show 'All' button... ###")
-
-        review_css = "article.user-review-item, div.review-container, div.lister-item.mode-detail.imdb-user-review, [data-testid='review-container']"
-
-        try:
-            # look for all buttons on the page
-            buttons = WebDriverWait(driver, 5).until(
-                EC.presence_of_all_elements_located((By.CSS_SELECTOR, 'button.ipc-see-more__button'))
-            )
-
-            if len(buttons) < 2:
-                print("### Show All button NOT found. ###")
-            else:
-                second_button = buttons[1]
-
-                # scroll into view and click it once to load more reviews
-                driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", second_button)
-                time.sleep(1)
-                second_button.click()
-                print("### Clicked the second button. ###")
-                time.sleep(3)  # Wait for content to load
-
-                print("### Starting scroll + wait cycle... ###")
-                x = 5
-                for i in range(x):
-                    driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", second_button)
-                    print(f"### Scroll {i+1}/{x} on second button. ###")
-                    time.sleep(3)
-
-        except (TimeoutException, ElementClickInterceptedException) as e:
-            print(f"### Error while clicking or scrolling: {type(e).__name__} ###")
-
         try:
             WebDriverWait(driver, 12).until(
-                lambda d: len(d.find_elements(By.CSS_SELECTOR, review_css)) > 0 or "No user reviews" in d.page_source
+                lambda d: len(d.find_elements(By.CSS_SELECTOR, REVIEW_CSS)) > 0 or "No user reviews" in d.page_source
             )
         except TimeoutException:
             print("### Timed out waiting for review containers. ###")
 
+        if _count_reviews(driver):
+            paginate_reviews(driver, target=max_reviews, stop_at=stop_at)
+
     except Exception as e:
         print(f"### Error during initial page load: {e} ###")
 
+    return driver.page_source
+
+def _element_text(element, separator=""):
+    # same as BeautifulSoup's get_text(separator, strip=True)
+    return separator.join(text.strip() for text in TEXT_XPATH(element) if text.strip())
+
+def _first_text(xpath, article, separator=""):
+    match = xpath(article)
+    return _element_text(match[0], separator) if match else None
+
+def _lxml_tree(page_source):
+    try:
+        return lxml_html.document_fromstring(page_source)
+    except ValueError:
+        # str input with an XML encoding declaration
+        return lxml_html.document_fromstring(page_source.encode("utf-8"))
+
+def parse_reviews_html_lxml(page_source):
+    # lxml tree + compiled XPath, walking only the review containers
+    if not page_source or not page_source.strip():
+        return []
+    tree = _lxml_tree(page_source)
+    reviews = []
+    seen_reviews = set()
+    for article in REVIEW_XPATH(tree):
+        title_text = _first_text(REVIEW_TITLE_XPATH, article)
+        comment_text = _first_text(REVIEW_COMMENT_XPATH, article, " ")
+        rating_text = _first_text(REVIEW_RATING_XPATH, article)
+        date_text = _first_text(REVIEW_DATE_XPATH, article)
+
+        title_text = _normalize_title_text(title_text) if title_text is not None else "N/A"
+        comment_text = comment_text if comment_text is not None else "N/A"
+        date_text = date_text if date_text is not None else "N/A"
+
+        review_key = (title_text, comment_text, rating_text, date_text)
+        if review_key in seen_reviews:
+            continue
+        seen_reviews.add(review_key)
+
+        if comment_text == "N/A" and title_text == "N/A":
+            continue
+
+        reviews.append({
+            "title": title_text,
+            "comment": comment_text,
+            "rating": rating_text,
+            "date": date_text
+        })
+
+    if not reviews:
+        # JSON-LD is only looked at when the markup had no reviews
+        fallback_reviews = _reviews_from_json_ld(script.text or "" for script in JSON_LD_XPATH(tree))
+        if fallback_reviews:
+            print(f"### Fallback JSON-LD reviews extracted: {len(fallback_reviews)} ###")
+            return fallback_reviews
+
+    return reviews
+
+def parse_reviews_html(page_source):
+    if HTML_PARSER == "lxml":
+        return parse_reviews_html_lxml(page_source)
+    return parse_reviews_html_soup(page_source)
+
+def parse_reviews_html_soup(page_source):
     # parse the fully loaded page with BeautifulSoup
-    soup = BeautifulSoup(driver.page_source, "lxml")
-    driver.quit()
+    soup = BeautifulSoup(page_source, "lxml")
     # extract all review elements from the HTML
-    articles = soup.select("article.user-review-item, div.review-container, div.lister-item.mode-detail.imdb-user-review, [data-testid='review-container']")
+    articles = soup.select(REVIEW_CSS)
     reviews = []
     seen_reviews = set()
     # parse each review and extract title, comment, rating, and date
@@ -351,6 +488,81 @@ def get_imdb_reviews(url):
             return fallback_reviews
 
     return reviews
+
+def has_more_reviews_lxml(page_source):
+    if not page_source or not page_source.strip():
+        return True
+    tree = _lxml_tree(page_source)
+    return bool(LOAD_MORE_XPATH(tree)) or not REVIEW_XPATH(tree)
+
+def has_more_reviews_soup(page_source):
+    soup = BeautifulSoup(page_source, "lxml")
+    return soup.select_one(LOAD_MORE_CSS) is not None or soup.select_one(REVIEW_CSS) is None
+
+def has_more_reviews(page_source):
+    # current markup: the see-more button loads the rest; a page without review containers
+    # (JSON-LD only) is filled in by script. Either way only the browser gets the full list
+    if HTML_PARSER == "lxml":
+        return has_more_reviews_lxml(page_source)
+    return has_more_reviews_soup(page_source)
+
+def _review_key(review):
+    return (review["title"], review["comment"], review["rating"], review["date"])
+
+def get_imdb_reviews_http(url, max_reviews=REVIEW_TARGET, stop_at=None, max_pages=HTTP_MAX_PAGES):
+    # returns (reviews, complete); complete is False when the rest of the reviews
+    # can only be reached by the browser
+    reviews = []
+    seen_reviews = set()
+    page_source = fetch_html(url)
+    pages = 0
+    while page_source:
+        page_reviews = parse_reviews_html(page_source)
+        for review in page_reviews:
+            key = _review_key(review)
+            if key not in seen_reviews:
+                seen_reviews.add(key)
+                reviews.append(review)
+        pages += 1
+        if max_reviews and len(reviews) >= max_reviews:
+            return reviews, True
+        if stop_at and any(stop_at(review) for review in page_reviews):
+            return reviews, True
+        next_url, params = next_review_page(page_source, url)
+        if not next_url:
+            # end of the legacy page chain, or a current-markup page that has everything
+            return reviews, pages > 1 or not has_more_reviews(page_source)
+        if pages >= max_pages:
+            return reviews, True
+        page_source = fetch_html(next_url, params=params)
+    # a follow-up page failed to load
+    return reviews, False
+
+def get_imdb_reviews_selenium(url, max_reviews=REVIEW_TARGET, stop_at=None):
+    with driver_pool.driver() as driver:
+        page_source = _load_reviews_page(driver, url, max_reviews=max_reviews, stop_at=stop_at)
+    if page_source is None:
+        return []
+    return parse_reviews_html(page_source)
+
+def get_imdb_reviews(url, max_reviews=REVIEW_TARGET, stop_at=None):
+    # stop_at: optional callable(review) -> bool; pagination ends once a page contains such a review
+    if not _is_valid_http_url(url):
+        print(f"### Invalid reviews URL: {url} ###")
+        return []
+
+    # lightweight HTTP path first, a full browser when it finds nothing or cannot paginate
+    if HTTP_SCRAPER_ENABLED:
+        reviews, complete = get_imdb_reviews_http(url, max_reviews=max_reviews, stop_at=stop_at)
+        if reviews and complete:
+            print(f"### HTTP scraper extracted {len(reviews)} reviews ###")
+            return reviews
+        if reviews:
+            print(f"### HTTP scraper got {len(reviews)} reviews but cannot reach the rest, falling back to Selenium. ###")
+        else:
+            print("### HTTP scraper found no reviews, falling back to Selenium. ###")
+
+    return get_imdb_reviews_selenium(url, max_reviews=max_reviews, stop_at=stop_at)
 
 def search_imdb_titles(query):
     if not query or not str(query).strip():
@@ -359,12 +571,9 @@ def search_imdb_titles(query):
     encoded_query = quote_plus(str(query).strip())
     search_url = f"https://www.imdb.com/find/?q={encoded_query}&s=tt&exact=true"
 
-    options = get_selenium_options()
-
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-    driver.get(search_url)
+    with driver_pool.driver() as driver:
+        driver.get(search_url)
 
-    try:
         WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
         print("########### Searching titles ###########")
         if _try_click_cookie_banner(driver, timeout=2):
@@ -395,9 +604,6 @@ def search_imdb_titles(query):
 
         soup = BeautifulSoup(driver.page_source, "lxml")
 
-    finally:
-        driver.quit()
-
     results = []
     seen_title_ids = set()
     items = soup.select("li.ipc-metadata-list-summary-item, li.find-result-item")
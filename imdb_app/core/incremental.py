@@ -0,0 +1,81 @@
+from core.imdb_scraper import get_imdb_reviews, build_imdb_reviews_url
+from db.postgre import comment_hash
+from datetime import datetime
+import hashlib
+import re
+
+DATE_FORMATS = ["%Y-%m-%d", "%b %d, %Y", "%B %d, %Y", "%d %B %Y", "%d %b %Y"]
+MAX_WATERMARK_HASHES = 200 # identities of the newest reviews kept per title
+
+def parse_review_date(text):
+    if not text or str(text).strip().upper() == "N/A":
+        return None
+    cleaned = re.sub(r"\s+", " ", str(text)).strip()
+    cleaned = cleaned[:10] if re.match(r"\d{4}-\d{2}-\d{2}", cleaned) else cleaned
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(cleaned, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+def review_dates(reviews):
+    # {comment hash: date} of the scraped reviews, stored with them by save_rating_results
+    dates = {}
+    for review in reviews:
+        review_date = parse_review_date(review.get("date"))
+        if review_date and review.get("comment"):
+            dates[comment_hash(review["comment"])] = review_date
+    return dates
+
+def review_hash(review):
+    # review identity: normalized title + comment (ratings and dates can be edited/reformatted)
+    title = re.sub(r"\s+", " ", str(review.get("title") or "")).strip().lower()
+    comment = re.sub(r"\s+", " ", str(review.get("comment") or "")).strip().lower()
+    return hashlib.sha256(f"{title}\0{comment}".encode("utf-8")).hexdigest()
+
+def reached_watermark(review, watermark):
+    # newest-first pagination can stop once an already harvested review, or one older
+    # than the high-water mark, shows up; same-day reviews are matched by identity only
+    if not watermark:
+        return False
+    if review.get("comment") and review_hash(review) in watermark["hashes"]:
+        return True
+    latest = watermark.get("latest_date")
+    review_date = parse_review_date(review.get("date"))
+    return bool(latest and review_date and review_date < latest)
+
+def is_known(review, watermark):
+    if not watermark:
+        return False
+    if review_hash(review) in watermark["hashes"]:
+        return True
+    latest = watermark.get("latest_date")
+    review_date = parse_review_date(review.get("date"))
+    # same-day reviews are only new if their identity has not been seen
+    return bool(latest and review_date and review_date < latest)
+
+def filter_new_reviews(reviews, watermark):
+    return [r for r in reviews if not is_known(r, watermark)]
+
+def advance_watermark(watermark, new_reviews):
+    dated = [(parse_review_date(r.get("date")), review_hash(r)) for r in new_reviews]
+    dates = [d for d, _ in dated if d]
+
+    latest = (watermark or {}).get("latest_date")
+    if dates and (latest is None or max(dates) > latest):
+        latest = max(dates)
+
+    # newest reviews first, then the identities already on record
+    dated.sort(key=lambda pair: pair[0] or datetime.min.date(), reverse=True)
+    hashes = list(dict.fromkeys([h for _, h in dated] + list((watermark or {}).get("hashes", []))))
+
+    return {"latest_date": latest, "hashes": hashes[:MAX_WATERMARK_HASHES]}
+
+def get_new_imdb_reviews(title_id, watermark):
+    # newest-first scrape that stops at the high-water mark and returns only the delta
+    url = build_imdb_reviews_url(f"https://www.imdb.com/title/{title_id}/", newest_first=bool(watermark))
+    reviews = get_imdb_reviews(url, stop_at=lambda review: reached_watermark(review, watermark))
+    delta = filter_new_reviews(reviews, watermark)
+    print(f"### Incremental scrape for {title_id}: {len(delta)} new of {len(reviews)} fetched ###")
+    return delta
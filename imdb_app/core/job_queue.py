@@ -0,0 +1,275 @@
+from contextlib import contextmanager
+import threading
+import sqlite3
+import json
+import time
+import uuid
+import os
+
+JOBS_PATH = os.getenv("JOBS_PATH", os.path.join("cache", "jobs.sqlite3"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2)) # worker threads per process, 0 = submit/poll only
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", 1))
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", 300)) # running jobs without a heartbeat are requeued
+JOB_KEEP_SECONDS = float(os.getenv("JOB_KEEP_SECONDS", 7 * 24 * 3600))
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+class JobRequeued(Exception):
+    # raised into a handler whose job was taken over after it looked stale
+    pass
+
+class JobQueue:
+    # persistent job table (sqlite, shared by every process) + a pool of worker threads;
+    # one queued/running job per key, so duplicate submissions merge into it
+    def __init__(self, handler, path=JOBS_PATH, workers=JOB_WORKERS, stale_seconds=JOB_STALE_SECONDS):
+        self.handler = handler
+        self.path = path
+        self.workers = max(0, int(workers))
+        self.stale_seconds = stale_seconds
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._maintained_at = None
+        self._maintain_lock = threading.Lock()
+        self._init_db()
+
+    def _init_db(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    key TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    stage TEXT,
+                    progress REAL NOT NULL DEFAULT 0,
+                    result TEXT,
+                    error TEXT,
+                    submissions INTEGER NOT NULL DEFAULT 1,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            # token of the current claim: a worker whose job was requeued can no longer write to it
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "claim" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN claim TEXT")
+            # partial results, appended as they are produced instead of rewriting the whole result
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_rows (
+                    job_id TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    data TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS job_rows_job ON job_rows (job_id, seq)")
+            # the merge point for duplicate submissions, across processes too
+            conn.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS jobs_active_key
+                ON jobs (key) WHERE status IN ('queued', 'running')
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def submit(self, key, payload):
+        # returns the job id; an active job for the same key is reused instead of queueing another
+        self._maybe_maintain() # a dead worker's job must not absorb new submissions
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            try:
+                conn.execute("""
+                    INSERT INTO jobs (id, key, payload, status, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (job_id, key, json.dumps(payload), QUEUED, now, now))
+            except sqlite3.IntegrityError:
+                job_id = conn.execute(
+                    "SELECT id FROM jobs WHERE key = ? AND status IN (?, ?)", (key, QUEUED, RUNNING)
+                ).fetchone()[0]
+                conn.execute("UPDATE jobs SET submissions = submissions + 1 WHERE id = ?", (job_id,))
+                print(f"### Job for {key} already active, merged into {job_id} ###")
+                return job_id
+        self._wake.set()
+        print(f"### Job {job_id} queued for {key} ###")
+        return job_id
+
+    def get(self, job_id):
+        # result: the job's result document, with the appended rows under their names
+        self._maybe_maintain()
+        with self._connect() as conn:
+            row = conn.execute("""
+                SELECT id, key, status, stage, progress, result, error, submissions, created_at, updated_at
+                FROM jobs WHERE id = ?
+            """, (job_id,)).fetchone()
+            if not row:
+                return None
+            rows = conn.execute("SELECT name, data FROM job_rows WHERE job_id = ? ORDER BY seq", (job_id,)).fetchall()
+        result = json.loads(row[5]) if row[5] else None
+        if rows:
+            result = result or {}
+            for name, data in rows:
+                result.setdefault(name, []).extend(json.loads(data))
+        return {
+            "id": row[0],
+            "key": row[1],
+            "status": row[2],
+            "stage": row[3],
+            "progress": row[4],
+            "result": result,
+            "error": row[6],
+            "submissions": row[7],
+            "created_at": row[8],
+            "updated_at": row[9]
+        }
+
+    def report(self, job_id, claim, stage=None, progress=None, result=None, rows=None):
+        # progress from a running job, also its heartbeat;
+        # result: keys merged into the result document, rows: {name: [items]} appended to the partial results
+        with self._connect() as conn:
+            updated = conn.execute("""
+                UPDATE jobs SET stage = COALESCE(?, stage), progress = COALESCE(?, progress), updated_at = ?
+                WHERE id = ? AND claim = ? AND status = ?
+            """, (stage, progress, time.time(), job_id, claim, RUNNING)).rowcount
+            if not updated:
+                return False
+            if result:
+                self._merge_result(conn, job_id, result)
+            for name, items in (rows or {}).items():
+                if items:
+                    conn.execute("INSERT INTO job_rows (job_id, name, data) VALUES (?, ?, ?)", (job_id, name, json.dumps(items)))
+        return True
+
+    def _merge_result(self, conn, job_id, result):
+        # a handful of calls per job (e.g. the scraped reviews once, the final summary once)
+        current = conn.execute("SELECT result FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+        merged = {**(json.loads(current) if current else {}), **result}
+        conn.execute("UPDATE jobs SET result = ? WHERE id = ?", (json.dumps(merged), job_id))
+
+    def _finish(self, job_id, claim, status, result=None, error=None):
+        # only the worker holding the current claim may finish the job
+        with self._connect() as conn:
+            updated = conn.execute("""
+                UPDATE jobs SET status = ?, progress = CASE WHEN ? = 'done' THEN 1 ELSE progress END,
+                    error = ?, updated_at = ?
+                WHERE id = ? AND claim = ? AND status = ?
+            """, (status, status, error, time.time(), job_id, claim, RUNNING)).rowcount
+            if updated and result:
+                self._merge_result(conn, job_id, result)
+        return bool(updated)
+
+    def _claim(self):
+        # oldest queued job, claimed atomically: BEGIN IMMEDIATE locks out other claimers
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        claim = uuid.uuid4().hex
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, payload FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, claim = ?, updated_at = ? WHERE id = ?",
+                    (RUNNING, claim, time.time(), row[0])
+                )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        return (row[0], claim, json.loads(row[1])) if row else (None, None, None)
+
+    def _maybe_maintain(self):
+        # at most once per heartbeat interval per process
+        with self._maintain_lock:
+            now = time.monotonic()
+            if self._maintained_at is not None and now - self._maintained_at < self.stale_seconds / 3:
+                return
+            self._maintained_at = now
+        self._maintain()
+
+    def _maintain(self):
+        now = time.time()
+        with self._connect() as conn:
+            # jobs of a process that died mid-run go back to the queue and start over
+            stale = [row[0] for row in conn.execute(
+                "SELECT id FROM jobs WHERE status = ? AND updated_at < ?", (RUNNING, now - self.stale_seconds)
+            )]
+            for job_id in stale:
+                requeued = conn.execute(
+                    "UPDATE jobs SET status = ?, stage = NULL, progress = 0, result = NULL, claim = NULL "
+                    "WHERE id = ? AND status = ? AND updated_at < ?",
+                    (QUEUED, job_id, RUNNING, now - self.stale_seconds)
+                ).rowcount
+                if requeued:
+                    conn.execute("DELETE FROM job_rows WHERE job_id = ?", (job_id,))
+            conn.execute("DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?", (DONE, FAILED, now - JOB_KEEP_SECONDS))
+            conn.execute("DELETE FROM job_rows WHERE job_id NOT IN (SELECT id FROM jobs)")
+        if stale:
+            print(f"### Requeued {len(stale)} stale jobs ###")
+            self._wake.set()
+
+    def _work(self):
+        while not self._stop.is_set():
+            job_id, claim, payload = self._claim()
+            if job_id is None:
+                self._maybe_maintain()
+                self._wake.wait(JOB_POLL_SECONDS)
+                self._wake.clear()
+                continue
+            print(f"### Job {job_id} started ###")
+            finished = threading.Event()
+            threading.Thread(target=self._heartbeat, args=(job_id, claim, finished), name=f"job-heartbeat-{job_id}", daemon=True).start()
+            try:
+                result = self.handler(payload, lambda **update: self._progress(job_id, claim, update))
+                if self._finish(job_id, claim, DONE, result=result):
+                    print(f"### Job {job_id} done ###")
+                else:
+                    print(f"### Job {job_id} was requeued, result dropped ###")
+            except JobRequeued:
+                print(f"### Job {job_id} was requeued, stopped ###")
+            except Exception as e:
+                self._finish(job_id, claim, FAILED, error=str(e))
+                print(f"### Job {job_id} failed: {e} ###")
+            finally:
+                finished.set()
+
+    def _progress(self, job_id, claim, update):
+        if not self.report(job_id, claim, **update):
+            raise JobRequeued(job_id)
+
+    def _heartbeat(self, job_id, claim, finished):
+        # keeps a long stage (e.g. a Selenium scrape) from looking stale
+        while not finished.wait(self.stale_seconds / 3):
+            self.report(job_id, claim)
+
+    def start(self):
+        if self._threads:
+            return
+        self._maintain()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
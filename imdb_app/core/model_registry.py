@@ -0,0 +1,145 @@
+from core.rating_predictor import RatingRegressor, train_and_predict_rating, N_JOBS, TRAIN_N_JOBS
+from db.postgre import Postgre
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import mean_absolute_error
+from datetime import datetime, timezone
+import threading
+import argparse
+import joblib
+import json
+import time
+import os
+
+MODEL_DIR = os.getenv("RATING_MODEL_DIR", os.path.join("models", "rating"))
+MIN_TRAINING_REVIEWS = int(os.getenv("RATING_MIN_TRAINING_REVIEWS", 200))
+HOLDOUT = float(os.getenv("RATING_HOLDOUT", 0.2)) # share of reviews kept out of training for the reported error
+MODEL_CHECK_SECONDS = float(os.getenv("RATING_MODEL_CHECK_SECONDS", 60)) # how often LATEST is re-read
+LATEST_FILE = "LATEST"
+
+def _version_dir(version, model_dir=MODEL_DIR):
+    return os.path.join(model_dir, version)
+
+def list_versions(model_dir=MODEL_DIR):
+    if not os.path.isdir(model_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(model_dir)
+        if os.path.isfile(os.path.join(model_dir, name, "model.joblib"))
+    )
+
+def latest_version(model_dir=MODEL_DIR):
+    try:
+        with open(os.path.join(model_dir, LATEST_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def save_model(regressor, metadata, model_dir=MODEL_DIR):
+    # written to a temporary directory first, then renamed: readers never see half an artifact
+    version = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    target = _version_dir(version, model_dir)
+    staging = target + ".tmp"
+    os.makedirs(staging, exist_ok=True)
+    joblib.dump(regressor, os.path.join(staging, "model.joblib"))
+    with open(os.path.join(staging, "metadata.json"), "w") as f:
+        json.dump({**metadata, "version": version}, f, indent=2)
+    os.replace(staging, target)
+
+    latest_tmp = os.path.join(model_dir, LATEST_FILE + ".tmp")
+    with open(latest_tmp, "w") as f:
+        f.write(version)
+    os.replace(latest_tmp, os.path.join(model_dir, LATEST_FILE))
+    print(f"### Saved rating model {version} to {target} ###")
+    return version
+
+def load_model(version=None, model_dir=MODEL_DIR):
+    # returns (regressor, version), or (None, None) when nothing has been trained yet
+    version = version or latest_version(model_dir)
+    if not version:
+        return None, None
+    regressor = joblib.load(os.path.join(_version_dir(version, model_dir), "model.joblib"))
+    # trained on every core; predictions share the machine with other requests and workers
+    regressor.set_n_jobs(N_JOBS)
+    print(f"### Loaded rating model {version} ###")
+    return regressor, version
+
+_model = (None, None)
+_checked_at = None
+_model_lock = threading.Lock()
+
+def get_model():
+    # cached per process; LATEST is checked again every MODEL_CHECK_SECONDS (on every call
+    # while no model is loaded) and a newly trained version replaces the cached one
+    global _model, _checked_at
+    with _model_lock:
+        now = time.monotonic()
+        if _model[0] is not None and _checked_at is not None and now - _checked_at < MODEL_CHECK_SECONDS:
+            return _model
+        _checked_at = now
+        version = latest_version()
+        if version and version != _model[1]:
+            try:
+                _model = load_model(version)
+            except Exception as e:
+                # keep serving the previous model, if any
+                print(f"### Could not load the rating model {version}: {e} ###")
+        return _model
+
+def reload_model():
+    global _checked_at
+    with _model_lock:
+        _checked_at = None
+    return get_model()
+
+def predict_ratings(reviews):
+    # interactive path: predict with the stored model, fit on the request's own reviews only if none exists
+    regressor, version = get_model()
+    return train_and_predict_rating(reviews, regressor, version)
+
+def train_global_model(limit=None, holdout=HOLDOUT, min_reviews=MIN_TRAINING_REVIEWS, model_dir=MODEL_DIR):
+    # offline job: one regressor over every rated review stored in PostgreSQL
+    with Postgre() as db:
+        comments, ratings = db.get_training_reviews(limit)
+    if len(comments) < min_reviews:
+        print(f"### Only {len(comments)} rated reviews stored, {min_reviews} needed to train ###")
+        return None
+
+    train_comments, test_comments, train_ratings, test_ratings = train_test_split(
+        comments, ratings, test_size=holdout, random_state=42
+    )
+    regressor = RatingRegressor(n_jobs=TRAIN_N_JOBS)
+    regressor.fit(train_comments, train_ratings)
+    # reported error is measured on reviews the model has not seen
+    holdout_mae = mean_absolute_error(test_ratings, regressor.predict(test_comments))
+
+    metadata = {
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+        "train_reviews": len(train_comments),
+        "holdout_reviews": len(test_comments),
+        "holdout_mae": round(float(holdout_mae), 3)
+    }
+    version = save_model(regressor, metadata, model_dir)
+    print(f"### Trained rating model {version}: {metadata} ###")
+    return version
+
+if __name__ == "__main__":
+    # usage: python -m core.model_registry train [--limit 100000] | list
+    parser = argparse.ArgumentParser(description="Train and inspect the stored rating models.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    train_parser = subparsers.add_parser("train", help="train a new model on the reviews in PostgreSQL")
+    train_parser.add_argument("--limit", type=int, help="train on the newest N rated reviews only")
+    train_parser.add_argument("--holdout", type=float, default=HOLDOUT)
+    train_parser.add_argument("--min-reviews", type=int, default=MIN_TRAINING_REVIEWS)
+    subparsers.add_parser("list", help="list the stored model versions")
+    args = parser.parse_args()
+
+    if args.command == "train":
+        if train_global_model(args.limit, args.holdout, args.min_reviews) is None:
+            raise SystemExit(1)
+    else:
+        latest = latest_version()
+        for name in list_versions():
+            with open(os.path.join(_version_dir(name), "metadata.json")) as f:
+                metadata = json.load(f)
+            marker = "*" if name == latest else " "
+            print(f"{marker} {name}  train={metadata.get('train_reviews')}  holdout_mae={metadata.get('holdout_mae')}")
@@ -0,0 +1,91 @@
+from core.imdb_scraper import parse_reviews_html_lxml, parse_reviews_html_soup
+import multiprocessing
+import argparse
+import resource
+import random
+import html
+import time
+
+PARSERS = {
+    "soup": parse_reviews_html_soup, # previous path
+    "lxml": parse_reviews_html_lxml
+}
+
+def synthetic_review_page(n, seed=42):
+    # IMDb-like markup with n review articles, for runs without saved pages
+    rng = random.Random(seed)
+    words = ["great", "boring", "plot", "acting", "twist", "slow", "masterpiece", "awful", "funny", "score"]
+    articles = []
+    for i in range(n):
+        body = html.escape(" ".join(rng.choice(words) for _ in range(rng.randint(40, 300))))
+        articles.append(
+            '<article class="sc-review user-review-item">'
+            f'<div class="ipc-title"><h3 class="ipc-title__text">Review {i}</h3></div>'
+            f'<span class="ipc-rating-star ipc-rating-star--rating">{rng.randint(1, 10)}</span>'
+            f'<div class="ipc-html-content ipc-html-content--base"><div class="ipc-html-content-inner-div" role="presentation">{body}<br/>{body[:40]}</div></div>'
+            '<ul class="ipc-inline-list"><li class="ipc-inline-list__item review-date">Jan 2, 2024</li></ul>'
+            '</article>'
+        )
+    return f"<html><head><title>Reviews</title></head><body><section>{''.join(articles)}</section></body></html>"
+
+def _parse_in_child(name, page_source, repeat, results):
+    # runs in a fresh process, so the peak RSS belongs to this parser only
+    parse = PARSERS[name]
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        reviews = parse(page_source)
+        timings.append(time.perf_counter() - started)
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results.put({
+        "parser": name,
+        "reviews": reviews,
+        "best_seconds": round(min(timings), 3),
+        "peak_rss_delta_mb": round((peak_kb - baseline_kb) / 1024, 1)
+    })
+
+def benchmark_page(page_source, repeat=3):
+    context = multiprocessing.get_context("spawn")
+    runs = {}
+    for name in PARSERS:
+        results = context.Queue()
+        process = context.Process(target=_parse_in_child, args=(name, page_source, repeat, results))
+        process.start()
+        runs[name] = results.get()
+        process.join()
+
+    # both parsers must extract the same reviews
+    mismatches = sum(1 for a, b in zip(runs["soup"]["reviews"], runs["lxml"]["reviews"]) if a != b)
+    mismatches += abs(len(runs["soup"]["reviews"]) - len(runs["lxml"]["reviews"]))
+    return {
+        "reviews": len(runs["lxml"]["reviews"]),
+        "mismatches": mismatches,
+        "soup_seconds": runs["soup"]["best_seconds"],
+        "lxml_seconds": runs["lxml"]["best_seconds"],
+        "soup_rss_mb": runs["soup"]["peak_rss_delta_mb"],
+        "lxml_rss_mb": runs["lxml"]["peak_rss_delta_mb"],
+        "speedup": round(runs["soup"]["best_seconds"] / max(runs["lxml"]["best_seconds"], 1e-6), 1)
+    }
+
+if __name__ == "__main__":
+    # usage: python -m core.parser_benchmark saved_page.html [...] | --synthetic 5000
+    parser = argparse.ArgumentParser(description="Compare the BeautifulSoup and lxml review parsers.")
+    parser.add_argument("pages", nargs="*", help="saved review pages (e.g. driver.page_source dumps)")
+    parser.add_argument("--synthetic", type=int, help="also benchmark a generated page with N reviews")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = []
+    for path in args.pages:
+        with open(path, encoding="utf-8") as f:
+            pages.append((path, f.read()))
+    if args.synthetic:
+        pages.append((f"synthetic-{args.synthetic}", synthetic_review_page(args.synthetic)))
+    if not pages:
+        parser.error("give saved pages and/or --synthetic N")
+
+    print(f"{'page':<32}{'reviews':>8}{'soup s':>9}{'lxml s':>9}{'speedup':>9}{'soup MB':>9}{'lxml MB':>9}{'diff':>6}")
+    for name, page_source in pages:
+        entry = benchmark_page(page_source, args.repeat)
+        print(f"{name[-32:]:<32}{entry['reviews']:>8}{entry['soup_seconds']:>9}{entry['lxml_seconds']:>9}{entry['speedup']:>9}{entry['soup_rss_mb']:>9}{entry['lxml_rss_mb']:>9}{entry['mismatches']:>6}")
@@ -0,0 +1,93 @@
+from core.rating_predictor import RatingRegressor
+from db.postgre import Postgre
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import mean_absolute_error
+import multiprocessing
+import argparse
+import random
+import time
+
+CONFIGURATIONS = [
+    {"name": "tfidf-1job-float64", "vectorizer": "tfidf", "n_jobs": 1, "dtype": "float64"}, # previous setup
+    {"name": "tfidf-alljobs-float32", "vectorizer": "tfidf", "n_jobs": -1, "dtype": "float32"},
+    {"name": "hashing-alljobs-float32", "vectorizer": "hashing", "n_jobs": -1, "dtype": "float32"}
+]
+
+def _synthetic_reviews(n, seed=42):
+    rng = random.Random(seed)
+    good = ["great", "masterpiece", "brilliant", "moving", "funny", "superb"]
+    bad = ["boring", "awful", "slow", "predictable", "weak", "mess"]
+    neutral = ["plot", "acting", "score", "ending", "cast", "director", "scene", "story"]
+    comments, ratings = [], []
+    for _ in range(n):
+        rating = rng.randint(1, 10)
+        tone = good if rating > 5 else bad
+        words = [rng.choice(tone if rng.random() < 0.3 else neutral) for _ in range(rng.randint(20, 120))]
+        comments.append(" ".join(words))
+        ratings.append(float(rating))
+    return comments, ratings
+
+def _stored_reviews(limit):
+    with Postgre() as db:
+        return db.get_training_reviews(limit)
+
+def _rss_mb(field):
+    # VmRSS = current, VmHWM = peak resident set size of this process
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return round(int(line.split()[1]) / 1024, 1)
+    return None
+
+def _run_configuration(config, comments, ratings, results):
+    # runs in a fresh process, so the peak RSS belongs to this configuration only
+    train_comments, test_comments, train_ratings, test_ratings = train_test_split(
+        comments, ratings, test_size=0.2, random_state=42
+    )
+    baseline = _rss_mb("VmRSS")
+    regressor = RatingRegressor(config["vectorizer"], config["n_jobs"], config["dtype"])
+    started = time.perf_counter()
+    regressor.fit(train_comments, train_ratings)
+    fit_seconds = time.perf_counter() - started
+    mae = mean_absolute_error(test_ratings, regressor.predict(test_comments))
+    peak = _rss_mb("VmHWM")
+    results.put({
+        "config": config["name"],
+        "fit_seconds": round(fit_seconds, 2),
+        "peak_rss_mb": peak,
+        "fit_rss_mb": round(peak - baseline, 1) if peak is not None and baseline is not None else None,
+        "holdout_mae": round(float(mae), 3)
+    })
+
+def run_benchmark(comments, ratings, configurations=CONFIGURATIONS):
+    context = multiprocessing.get_context("spawn")
+    report = []
+    for config in configurations:
+        results = context.Queue()
+        process = context.Process(target=_run_configuration, args=(config, comments, ratings, results))
+        process.start()
+        entry = results.get()
+        process.join()
+        report.append(entry)
+        print(f"### {entry} ###")
+    return report
+
+if __name__ == "__main__":
+    # usage: python -m core.rating_benchmark [--synthetic 100000 | --limit 100000]
+    parser = argparse.ArgumentParser(description="Compare RatingRegressor training configurations.")
+    parser.add_argument("--synthetic", type=int, help="use N generated reviews instead of the stored ones")
+    parser.add_argument("--limit", type=int, help="use the newest N stored reviews")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        comments, ratings = _synthetic_reviews(args.synthetic)
+    else:
+        comments, ratings = _stored_reviews(args.limit)
+    if len(comments) < 10:
+        parser.error("not enough reviews to benchmark")
+
+    print(f"### Benchmarking on {len(comments)} reviews ###")
+    report = run_benchmark(comments, ratings)
+    print(f"{'config':<26}{'fit s':>8}{'peak MB':>10}{'fit MB':>9}{'MAE':>8}")
+    for entry in report:
+        print(f"{entry['config']:<26}{entry['fit_seconds']:>8}{entry['peak_rss_mb']:>10}{entry['fit_rss_mb']:>9}{entry['holdout_mae']:>8}")
@@ -0,0 +1,73 @@
+from core.rating_predictor import parse_rating, parse_ratings, prepare_training_data
+import argparse
+import random
+import math
+import time
+
+EDGE_CASES = [
+    None, "", "   ", "N/A", "n/a", "10", "10/10", " 8/10 ", "8.5/10", "8,5", "8,5/10", "0", "0/10",
+    "11/10", "-3", "Rated 7 out of 10", "7.25", "abc", 9, 9.5, 12, float("nan"), True
+]
+
+def _per_row_training_data(reviews):
+    # the previous loop in train_and_predict_rating
+    comments = []
+    ratings = []
+    for r in reviews:
+        comment = str(r.get("comment", "")).strip()
+        parsed_rating = parse_rating(r.get("rating"))
+        if comment and comment.upper() != "N/A" and parsed_rating is not None:
+            comments.append(comment)
+            ratings.append(parsed_rating)
+    return comments, ratings
+
+def _random_reviews(n, seed=42):
+    rng = random.Random(seed)
+    comments = ["", "  ", "N/A", "n/a", None, "Great film", "  Slow but moving  ", "Meh."]
+    ratings = EDGE_CASES + [f"{rng.randint(0, 12)}/10" for _ in range(10)] + [f"{rng.randint(0, 10)},{rng.randint(0, 9)}"]
+    return [
+        {"comment": rng.choice(comments), "rating": rng.choice(ratings)} if rng.random() > 0.05 else {}
+        for _ in range(n)
+    ]
+
+def _same(expected, actual):
+    if expected is None:
+        return actual is None or (isinstance(actual, float) and math.isnan(actual))
+    return actual == expected
+
+def check_equivalence(n=100000):
+    mismatches = []
+    columnar = parse_ratings(EDGE_CASES).tolist()
+    for value, actual in zip(EDGE_CASES, columnar):
+        if not _same(parse_rating(value), actual):
+            mismatches.append((value, parse_rating(value), actual))
+
+    reviews = _random_reviews(n)
+    started = time.perf_counter()
+    expected = _per_row_training_data(reviews)
+    per_row_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    actual = prepare_training_data(reviews)
+    columnar_seconds = time.perf_counter() - started
+    if expected != actual:
+        mismatches.append(("training data", len(expected[0]), len(actual[0])))
+
+    return {
+        "reviews": n,
+        "mismatches": mismatches,
+        "per_row_seconds": round(per_row_seconds, 3),
+        "columnar_seconds": round(columnar_seconds, 3)
+    }
+
+if __name__ == "__main__":
+    # usage: python -m core.rating_parse_check [--reviews 100000]
+    parser = argparse.ArgumentParser(description="Check the columnar rating parser against the per-row one.")
+    parser.add_argument("--reviews", type=int, default=100000)
+    args = parser.parse_args()
+
+    report = check_equivalence(args.reviews)
+    for mismatch in report["mismatches"]:
+        print(f"### Mismatch: {mismatch} ###")
+    print(f"### {report['reviews']} reviews: per-row {report['per_row_seconds']}s, columnar {report['columnar_seconds']}s ###")
+    if report["mismatches"]:
+        raise SystemExit(1)
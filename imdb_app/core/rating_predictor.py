@@ -1,20 +1,47 @@
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import SGDRegressor
+from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer, TfidfTransformer
 from sklearn.pipeline import make_pipeline
+import pandas as pd
 import numpy as np
+import os
 import re
 
+VECTORIZER = os.getenv("RATING_VECTORIZER", "tfidf") # tfidf | hashing
+N_JOBS = int(os.getenv("RATING_N_JOBS", 1)) # cores per forest in the dashboard, jobs and pipeline workers
+TRAIN_N_JOBS = int(os.getenv("RATING_TRAIN_N_JOBS", -1)) # cores for the offline training job, -1 = all
+MAX_FEATURES = int(os.getenv("RATING_MAX_FEATURES", 1000)) # tfidf vocabulary size
+HASHING_FEATURES = int(os.getenv("RATING_HASHING_FEATURES", 2 ** 16))
+FEATURE_DTYPE = os.getenv("RATING_FEATURE_DTYPE", "float32")
+STREAMING_FEATURES = int(os.getenv("RATING_STREAMING_FEATURES", 2 ** 20))
+
+def build_vectorizer(kind=VECTORIZER, dtype=FEATURE_DTYPE):
+    if kind == "tfidf":
+        return [TfidfVectorizer(max_features=MAX_FEATURES, dtype=np.dtype(dtype))]
+    if kind == "hashing":
+        # no vocabulary held in memory; idf weights are still learned on the hashed counts
+        return [
+            HashingVectorizer(n_features=HASHING_FEATURES, alternate_sign=False, norm=None, dtype=np.dtype(dtype)),
+            TfidfTransformer()
+        ]
+    raise ValueError(f"Unknown vectorizer: {kind}")
+
 class RatingRegressor:
-    def __init__(self):
+    def __init__(self, vectorizer=VECTORIZER, n_jobs=N_JOBS, dtype=FEATURE_DTYPE, n_estimators=100):
+        # the forest works on float32 internally, float32 features save a full copy of the matrix
         self.pipeline = make_pipeline(
-            TfidfVectorizer(max_features=1000),
-            RandomForestRegressor(n_estimators=100, random_state=42) # 100 trees
+            *build_vectorizer(vectorizer, dtype),
+            RandomForestRegressor(n_estimators=n_estimators, n_jobs=n_jobs, random_state=42) # 100 trees
         )
         self.trained = False
 
     def fit(self, comments, ratings):
         self.pipeline.fit(comments, ratings)
         self.trained = True
+
+    def set_n_jobs(self, n_jobs):
+        # a stored forest predicts with the n_jobs it was trained with
+        self.pipeline.steps[-1][1].set_params(n_jobs=n_jobs)
 
     def predict(self, comments):
         if not self.trained:
@@ -25,54 +52,85 @@ class RatingRegressor:
         preds = self.predict(comments)
         deltas = preds - np.array(true_ratings) # difference between predicted and true ratings
         return preds, deltas
+
+class StreamingRatingRegressor(RatingRegressor):
+    # trained one chunk at a time: stateless hashed features + a linear model updated by SGD
+    def __init__(self, n_features=STREAMING_FEATURES, alpha=1e-5):
+        self.vectorizer = HashingVectorizer(n_features=n_features, alternate_sign=False, dtype=np.float32)
+        self.model = SGDRegressor(alpha=alpha, random_state=42)
+        self.trained = False
+
+    def fit(self, comments, ratings):
+        self.model.partial_fit(self.vectorizer.transform(comments), np.asarray(ratings, dtype=np.float64))
+        self.trained = True
+
+    def set_n_jobs(self, n_jobs):
+        pass # single-threaded linear model
+
+    def predict(self, comments):
+        if not self.trained:
+            raise ValueError("Model is not trained yet.")
+        # a linear model can leave the rating scale
+        return np.clip(self.model.predict(self.vectorizer.transform(comments)), 1, 10)
 
 
-def train_and_predict_rating(reviews):
-    def parse_rating(value):
-        if value is None:
-            return None
+RATING_PATTERN = r"(\d+(?:[.,]\d+)?)" # "10", "10/10", "8.5/10", "8,5"
 
-        text = str(value).strip()
-        if not text or text.upper() == "N/A":
-            return None
+def parse_rating(value):
+    # per-row reference for parse_ratings
+    if value is None:
+        return None
 
-        # Handles formats like "10", "10/10", "8.5/10".
-        match = re.search(r"\d+(?:[.,]\d+)?", text)
-        if not match:
-            return None
+    text = str(value).strip()
+    if not text or text.upper() == "N/A":
+        return None
 
-        numeric = float(match.group(0).replace(",", "."))
-        if numeric < 0 or numeric > 10:
-            return None
-        return numeric
+    # Handles formats like "10", "10/10", "8.5/10".
+    match = re.search(RATING_PATTERN, text)
+    if not match:
+        return None
 
-    comments = []
-    ratings = []
+    numeric = float(match.group(0).replace(",", "."))
+    if numeric < 0 or numeric > 10:
+        return None
+    return numeric
 
-    for r in reviews:
-        comment = str(r.get("comment", "")).strip()
-        parsed_rating = parse_rating(r.get("rating"))
+def parse_ratings(values):
+    # columnar parse_rating: NaN wherever the per-row version returns None
+    text = pd.Series(values, dtype=object).astype(str).str.strip()
+    numbers = pd.to_numeric(
+        text.str.extract(RATING_PATTERN, expand=False).str.replace(",", ".", regex=False),
+        errors="coerce"
+    )
+    return numbers.where((numbers >= 0) & (numbers <= 10))
 
-        # include only reviews with both comment and valid rating
-        if comment and comment.upper() != "N/A" and parsed_rating is not None:
-            comments.append(comment)
-            ratings.append(parsed_rating)  # IMDb ratings: 1-10
+def prepare_training_data(reviews):
+    # include only reviews with both comment and valid rating; returns (comments, ratings)
+    comments = pd.Series([r.get("comment", "") for r in reviews], dtype=object).astype(str).str.strip()
+    ratings = parse_ratings([r.get("rating") for r in reviews])
+    keep = (comments != "") & (comments.str.upper() != "N/A") & ratings.notna()
+    return comments[keep].tolist(), ratings[keep].astype(float).tolist() # IMDb ratings: 1-10
+
+def train_and_predict_rating(reviews, regressor=None, model_version=None):
+    comments, ratings = prepare_training_data(reviews)
 
     if not comments:
         return None
 
-    regressor = RatingRegressor()
-    regressor.fit(comments, ratings)
+    if regressor is None:
+        # no stored model: fit on these reviews (deltas are in-sample)
+        print("### No trained rating model found, fitting on the current reviews ###")
+        regressor = RatingRegressor()
+        regressor.fit(comments, ratings)
+        model_version = "in-request"
 
     predictions, deltas = regressor.evaluate(comments, ratings)
 
-    results = []
-    for i in range(len(comments)):
-        results.append({
-            "comment": comments[i],
-            "true_rating": ratings[i],
-            "predicted_rating": round(predictions[i], 1),
-            "delta": round(deltas[i], 1)
-        })
-
-    return results    
+    results = pd.DataFrame({
+        "comment": comments,
+        "true_rating": ratings,
+        "predicted_rating": np.round(predictions, 1),
+        "delta": np.round(deltas, 1),
+        "model_version": model_version
+    })
+    return results.to_dict("records")
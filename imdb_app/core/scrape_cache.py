@@ -0,0 +1,151 @@
+from core.imdb_scraper import search_imdb_titles, get_imdb_reviews
+from contextlib import contextmanager
+import threading
+import sqlite3
+import json
+import time
+import os
+
+CACHE_PATH = os.getenv("SCRAPE_CACHE_PATH", os.path.join("cache", "scrape_cache.sqlite3"))
+CACHE_MAX_MB = float(os.getenv("SCRAPE_CACHE_MAX_MB", 256))
+SEARCH_TTL = float(os.getenv("SCRAPE_CACHE_SEARCH_TTL", 6 * 3600)) # seconds a search result stays fresh
+REVIEWS_TTL = float(os.getenv("SCRAPE_CACHE_REVIEWS_TTL", 24 * 3600))
+STALE_TTL = float(os.getenv("SCRAPE_CACHE_STALE_TTL", 7 * 24 * 3600)) # extra time stale data may still be served
+REFRESH_LEASE = 600 # seconds one process owns a background refresh
+
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+class ScrapeCache:
+    def __init__(self, path=CACHE_PATH, max_bytes=CACHE_MAX_MB * 1024 * 1024, stale_ttl=STALE_TTL):
+        self.path = path
+        self.max_bytes = int(max_bytes)
+        self.stale_ttl = stale_ttl
+        self._init_db()
+
+    def _init_db(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL") # readers do not block the background refresh
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS scrape_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    refresh_started REAL
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        # short-lived connections: the file is shared by every process and thread
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key):
+        # returns (value, age_seconds) or (None, None)
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, created_at FROM scrape_cache WHERE key = ?", (key,)).fetchone()
+            if not row:
+                return None, None
+            conn.execute("UPDATE scrape_cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0]), time.time() - row[1]
+
+    def put(self, key, value):
+        payload = json.dumps(value)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO scrape_cache (key, value, size, created_at, accessed_at, refresh_started)
+                VALUES (?, ?, ?, ?, ?, NULL)
+            """, (key, payload, len(payload), now, now))
+        self._evict()
+
+    def delete(self, key):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM scrape_cache WHERE key = ?", (key,))
+
+    def _evict(self):
+        # drop least recently used entries until the cache fits in max_bytes
+        with self._connect() as conn:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM scrape_cache").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            rows = conn.execute("SELECT key, size FROM scrape_cache ORDER BY accessed_at ASC").fetchall()
+            evicted = []
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                evicted.append((key,))
+                total -= size
+            conn.executemany("DELETE FROM scrape_cache WHERE key = ?", evicted)
+        print(f"### Scrape cache evicted {len(evicted)} entries ###")
+
+    def _claim_refresh(self, key):
+        # only one process/thread refreshes a given key at a time
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute("""
+                UPDATE scrape_cache SET refresh_started = ?
+                WHERE key = ? AND (refresh_started IS NULL OR refresh_started < ?)
+            """, (now, key, now - REFRESH_LEASE))
+            return cursor.rowcount == 1
+
+    def _refresh(self, key, fetch):
+        try:
+            value = fetch()
+        except Exception as e:
+            print(f"### Background refresh failed for {key}: {e} ###")
+            value = None
+        if value:
+            self.put(key, value)
+        else:
+            # keep serving the stale value, allow another attempt after the lease
+            print(f"### Background refresh returned nothing for {key} ###")
+
+    def get_or_fetch(self, key, fetch, ttl):
+        # stale-while-revalidate: stale values are returned at once and refreshed in the background
+        value, age = self.get(key)
+        if value is not None and age <= ttl:
+            return value, FRESH
+
+        if value is not None and age <= ttl + self.stale_ttl:
+            if self._claim_refresh(key):
+                threading.Thread(target=self._refresh, args=(key, fetch), name=f"refresh-{key}", daemon=True).start()
+            return value, STALE
+
+        value = fetch()
+        if value:
+            self.put(key, value) # empty results are not cached
+        return value, MISS
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_scrape_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ScrapeCache()
+        return _cache
+
+def _normalize_query(query):
+    return " ".join(str(query).lower().split())
+
+def cached_search_imdb_titles(query):
+    # returns (results, FRESH | STALE | MISS)
+    key = f"search:{_normalize_query(query)}"
+    return get_scrape_cache().get_or_fetch(key, lambda: search_imdb_titles(query), SEARCH_TTL)
+
+def cached_get_imdb_reviews(title_id, url):
+    key = f"reviews:{title_id}"
+    return get_scrape_cache().get_or_fetch(key, lambda: get_imdb_reviews(url), REVIEWS_TTL)
@@ -0,0 +1,85 @@
+from core.imdb_scraper import get_imdb_reviews_http, get_imdb_reviews_selenium
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from functools import partial
+import threading
+import argparse
+import shutil
+import tempfile
+import os
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# first page of each harvest -> whether the HTTP path may finish it without the browser
+FIXTURES = {
+    "reviews_current.html": False, # current markup: more reviews behind the see-more button
+    "reviews_current_single.html": True, # current markup, every review on the first page
+    "reviews_legacy.html": True, # legacy markup, followed to reviews_legacy_2.html
+    "reviews_json_ld.html": False # no review markup, JSON-LD only
+}
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+def _serve(directory):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def run_check(pages, browser=True):
+    # serves the fixtures (and any saved pages) locally and runs both backends on each first page
+    directory = tempfile.mkdtemp(prefix="review-fixtures-")
+    for name in os.listdir(FIXTURE_DIR):
+        shutil.copy(os.path.join(FIXTURE_DIR, name), directory)
+    for path in pages:
+        shutil.copy(path, directory)
+    server, base_url = _serve(directory)
+
+    expected = {**FIXTURES, **{os.path.basename(path): None for path in pages}}
+    report = []
+    try:
+        for name, expected_complete in expected.items():
+            url = f"{base_url}/{name}"
+            # the browser only ever sees this one page, so the HTTP side is held to it as well
+            http_reviews, _ = get_imdb_reviews_http(url, max_pages=1)
+            _, complete = get_imdb_reviews_http(url)
+            entry = {
+                "page": name,
+                "http_reviews": http_reviews,
+                "complete": complete,
+                "expected_complete": expected_complete,
+                "browser_reviews": get_imdb_reviews_selenium(url) if browser else None
+            }
+            report.append(entry)
+    finally:
+        server.shutdown()
+        shutil.rmtree(directory, ignore_errors=True)
+    return report
+
+def _mismatches(entry):
+    if entry["browser_reviews"] is None:
+        return 0
+    a, b = entry["http_reviews"], entry["browser_reviews"]
+    return sum(1 for x, y in zip(a, b) if x != y) + abs(len(a) - len(b))
+
+if __name__ == "__main__":
+    # usage: python -m core.scraper_fixture_check [saved_page.html ...] [--no-browser]
+    parser = argparse.ArgumentParser(description="Check that the HTTP and Selenium scrapers return the same reviews.")
+    parser.add_argument("pages", nargs="*", help="extra saved review pages (e.g. curl or driver.page_source dumps)")
+    parser.add_argument("--no-browser", action="store_true", help="only check the HTTP path and its Selenium hand-over")
+    args = parser.parse_args()
+
+    report = run_check(args.pages, browser=not args.no_browser)
+    failed = False
+    print(f"{'page':<28}{'http':>6}{'browser':>9}{'diff':>6}{'complete':>10}{'expected':>10}")
+    for entry in report:
+        browser_count = "-" if entry["browser_reviews"] is None else len(entry["browser_reviews"])
+        expected = "-" if entry["expected_complete"] is None else entry["expected_complete"]
+        diff = _mismatches(entry)
+        print(f"{entry['page'][-28:]:<28}{len(entry['http_reviews']):>6}{browser_count:>9}{diff:>6}{str(entry['complete']):>10}{str(expected):>10}")
+        if not entry["http_reviews"] or diff:
+            failed = True
+        if entry["expected_complete"] is not None and entry["complete"] != entry["expected_complete"]:
+            failed = True
+    if failed:
+        raise SystemExit(1)
@@ -1,12 +1,83 @@
-import requests
+from core.sentiment_client import get_client, BERT_API_URL
+from db.postgre import Postgre, comment_hash
+import json
 
-BERT_API_URL = "http://localhost:5000/analyze"
+BERT_STREAM_URL = BERT_API_URL.rstrip("/") + "/stream"
 
-def analyze_sentiment(reviews):
+def _stored_sentiments(reviews, title_id):
+    # results the current model already produced for known reviews of this title
+    if not title_id or not reviews:
+        return {}
+    model_version = get_client().get_model_version()
+    if not model_version:
+        return {}
     try:
-        response = requests.post(BERT_API_URL, json={"texts": reviews})
-        response.raise_for_status()
-        return response.json()
+        with Postgre() as db:
+            stored = db.get_stored_sentiments(title_id, reviews, model_version)
+    except Exception as e:
+        print(f"### Could not read stored sentiments: {e} ###")
+        return {}
+    if stored:
+        print(f"### Reusing {len(stored)} stored sentiment results for {title_id} ###")
+    return stored
+
+def _valid_reviews(reviews):
+    # same filter as the client, so results map back one-to-one
+    return [review for review in reviews if isinstance(review, str) and review.strip()]
+
+def analyze_sentiment(reviews, title_id=None):
+    # chunked, concurrent and retried; failed chunks come back with label None
+    reviews = _valid_reviews(reviews)
+    stored = _stored_sentiments(reviews, title_id)
+    computed = iter(get_client().analyze([r for r in reviews if comment_hash(r) not in stored]))
+
+    results = []
+    for review in reviews:
+        hit = stored.get(comment_hash(review))
+        results.append({**hit, "review": review} if hit else next(computed))
+    return results
+
+def _ndjson_body(reviews):
+    # bytes, not a generator: the session's retries have to send the same body again
+    return "".join(json.dumps(review) + "\n" for review in reviews).encode("utf-8")
+
+def analyze_sentiment_stream(reviews, title_id=None):
+    # generator: stored results at once, the rest as soon as the API has scored its batch
+    reviews = _valid_reviews(reviews)
+    stored = _stored_sentiments(reviews, title_id)
+    computed = _stream_from_api([r for r in reviews if comment_hash(r) not in stored])
+
+    for review in reviews:
+        hit = stored.get(comment_hash(review))
+        if hit:
+            yield {**hit, "review": review}
+            continue
+        result = next(computed, None)
+        if result is None:
+            return # stream failed, already reported
+        result.pop("index", None) # position among the uncached reviews only
+        yield result
+
+def _stream_from_api(reviews):
+    if not reviews:
+        return
+    try:
+        with get_client().session.post(
+            BERT_STREAM_URL,
+            data=_ndjson_body(reviews),
+            headers={"Content-Type": "application/x-ndjson"},
+            timeout=get_client().timeout,
+            stream=True
+        ) as response:
+            response.raise_for_status()
+            get_client().model_version = response.headers.get("X-Model-Version", get_client().model_version)
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                result = json.loads(line)
+                if "error" in result:
+                    print(f"### Error analyzing: {result['error']} ###")
+                    return
+                yield result
     except Exception as e:
         print(f"### Error analyzing: {e} ###")
-        return []
@@ -0,0 +1,107 @@
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import threading
+import requests
+import time
+import os
+
+BERT_API_URL = os.getenv("BERT_API_URL", "http://localhost:5000/analyze")
+BERT_MODEL_URL = os.getenv("BERT_MODEL_URL", BERT_API_URL.rsplit("/", 1)[0] + "/model")
+CHUNK_SIZE = int(os.getenv("SENTIMENT_CHUNK_SIZE", 64))
+CONCURRENCY = int(os.getenv("SENTIMENT_CONCURRENCY", 4))
+CHUNK_TIMEOUT = float(os.getenv("SENTIMENT_CHUNK_TIMEOUT", 60)) # seconds, per chunk request
+CONNECT_TIMEOUT = float(os.getenv("SENTIMENT_CONNECT_TIMEOUT", 5))
+MAX_RETRIES = int(os.getenv("SENTIMENT_MAX_RETRIES", 3))
+BACKOFF_FACTOR = float(os.getenv("SENTIMENT_BACKOFF_FACTOR", 0.5))
+MODEL_VERSION_TTL = float(os.getenv("SENTIMENT_MODEL_VERSION_TTL", 60)) # seconds between GET /model checks
+
+class SentimentClient:
+    def __init__(self, url=BERT_API_URL, chunk_size=CHUNK_SIZE, concurrency=CONCURRENCY,
+                 timeout=CHUNK_TIMEOUT, max_retries=MAX_RETRIES, backoff_factor=BACKOFF_FACTOR):
+        self.url = url
+        self.model_version = None # fingerprint of the model that answered last
+        self.model_version_checked = None # monotonic time of the last GET /model
+        self.chunk_size = max(1, int(chunk_size))
+        self.concurrency = max(1, int(concurrency))
+        self.timeout = (CONNECT_TIMEOUT, timeout)
+
+        # retries with exponential backoff on connection errors, read timeouts and 5xx/429 answers
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"GET", "POST"}),
+            raise_on_status=False
+        )
+        # persistent connection pool, sized for the concurrent chunk requests
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _chunks(self, texts):
+        return [texts[i:i + self.chunk_size] for i in range(0, len(texts), self.chunk_size)]
+
+    def _analyze_chunk(self, chunk):
+        try:
+            response = self.session.post(self.url, json={"texts": chunk}, timeout=self.timeout)
+            response.raise_for_status()
+            self.model_version = response.headers.get("X-Model-Version", self.model_version)
+            results = response.json()
+            if len(results) != len(chunk):
+                raise ValueError(f"expected {len(chunk)} results, got {len(results)}")
+            return results
+        except Exception as e:
+            # a failed chunk only loses its own texts, marked with an empty label
+            print(f"### Error analyzing chunk of {len(chunk)} reviews: {e} ###")
+            return [{"label": None, "score": None, "review": text} for text in chunk]
+
+    def analyze(self, texts):
+        # the API skips blank texts, drop them here so each chunk maps back one-to-one
+        texts = [text for text in texts if isinstance(text, str) and text.strip()]
+        chunks = self._chunks(texts)
+        if not chunks:
+            return []
+
+        if len(chunks) == 1:
+            return self._analyze_chunk(chunks[0])
+
+        # chunks run concurrently, map() keeps the original order when merging
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(chunks))) as executor:
+            chunk_results = list(executor.map(self._analyze_chunk, chunks))
+
+        return [result for results in chunk_results for result in results]
+
+    def get_model_version(self):
+        # re-asked every MODEL_VERSION_TTL seconds, since stored results can be reused without
+        # any /analyze call: a replaced model (or backend) must stop matching them
+        now = time.monotonic()
+        if self.model_version_checked is None or now - self.model_version_checked >= MODEL_VERSION_TTL:
+            try:
+                response = self.session.get(BERT_MODEL_URL, timeout=self.timeout)
+                response.raise_for_status()
+                self.model_version = response.json().get("model_version")
+                self.model_version_checked = now
+            except Exception as e:
+                # unknown version: nothing stored is reused
+                print(f"### Could not read the sentiment model version: {e} ###")
+                return None
+        return self.model_version
+
+    def close(self):
+        self.session.close()
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    # one client (and connection pool) per process
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = SentimentClient()
+        return _client
@@ -0,0 +1,98 @@
+from core.rating_predictor import StreamingRatingRegressor
+from core.model_registry import save_model, MODEL_DIR
+from db.postgre import Postgre
+from datetime import datetime, timezone
+import argparse
+import random
+import joblib
+import os
+
+CHUNK_SIZE = int(os.getenv("RATING_STREAM_CHUNK_SIZE", 5000)) # reviews held in memory at a time
+EPOCHS = int(os.getenv("RATING_STREAM_EPOCHS", 3))
+CHECKPOINT_EVERY = int(os.getenv("RATING_STREAM_CHECKPOINT_EVERY", 20)) # chunks between checkpoints
+CHECKPOINT_PATH = os.getenv("RATING_STREAM_CHECKPOINT", os.path.join(MODEL_DIR, "streaming.checkpoint.joblib"))
+HOLDOUT_MODULO = 10 # reviews with id % 10 == 0 are never trained on
+
+def _save_checkpoint(state, path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    joblib.dump(state, path + ".tmp")
+    os.replace(path + ".tmp", path)
+
+def _load_checkpoint(path):
+    if not os.path.exists(path):
+        return None
+    state = joblib.load(path)
+    print(f"### Resuming from checkpoint: epoch {state['epoch']}, after review id {state['last_id']} ###")
+    return state
+
+def _holdout_mae(db, regressor, chunk_size):
+    # one more streamed pass, over the held-out reviews only
+    total_error = 0.0
+    count = 0
+    for rows in db.iter_training_chunks(chunk_size):
+        holdout = [(comment, rating) for review_id, comment, rating in rows if review_id % HOLDOUT_MODULO == 0]
+        if not holdout:
+            continue
+        _, deltas = regressor.evaluate([c for c, _ in holdout], [r for _, r in holdout])
+        total_error += float(abs(deltas).sum())
+        count += len(holdout)
+    return round(total_error / count, 3) if count else None
+
+def train_streaming(chunk_size=CHUNK_SIZE, epochs=EPOCHS, checkpoint_path=CHECKPOINT_PATH,
+                    checkpoint_every=CHECKPOINT_EVERY, resume=True):
+    # out-of-core training: memory depends on chunk_size, not on how many reviews are stored
+    state = _load_checkpoint(checkpoint_path) if resume else None
+    state = state or {"regressor": StreamingRatingRegressor(), "epoch": 0, "last_id": 0, "trained_rows": 0}
+    regressor = state["regressor"]
+
+    with Postgre() as db:
+        while state["epoch"] < epochs:
+            # reviews arrive grouped by title, shuffling each chunk softens that for SGD
+            rng = random.Random(state["epoch"])
+            for i, rows in enumerate(db.iter_training_chunks(chunk_size, state["last_id"])):
+                train = [(comment, rating) for review_id, comment, rating in rows if review_id % HOLDOUT_MODULO]
+                rng.shuffle(train)
+                if train:
+                    regressor.fit([c for c, _ in train], [r for _, r in train])
+                state["last_id"] = rows[-1][0]
+                state["trained_rows"] += len(train)
+                if (i + 1) % checkpoint_every == 0:
+                    _save_checkpoint(state, checkpoint_path)
+                    print(f"### Epoch {state['epoch'] + 1}/{epochs}: {state['trained_rows']} reviews trained ###")
+            state["epoch"] += 1
+            state["last_id"] = 0
+            _save_checkpoint(state, checkpoint_path)
+
+        if not regressor.trained:
+            print("### No rated reviews stored, nothing to train ###")
+            return None
+        holdout_mae = _holdout_mae(db, regressor, chunk_size)
+
+    metadata = {
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+        "mode": "streaming",
+        "epochs": epochs,
+        "train_reviews": state["trained_rows"],
+        "holdout_mae": holdout_mae
+    }
+    version = save_model(regressor, metadata)
+    # finished: the next run starts from scratch
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    print(f"### Trained streaming rating model {version}: {metadata} ###")
+    return version
+
+if __name__ == "__main__":
+    # usage: python -m core.streaming_trainer [--chunk-size 5000] [--epochs 3] [--restart]
+    parser = argparse.ArgumentParser(description="Train the rating model over all stored reviews, chunk by chunk.")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH)
+    parser.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_EVERY)
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    args = parser.parse_args()
+
+    if train_streaming(args.chunk_size, args.epochs, args.checkpoint, args.checkpoint_every, not args.restart) is None:
+        raise SystemExit(1)
@@ -0,0 +1,104 @@
+from db.postgre import Postgre, comment_hash
+from datetime import datetime, timezone
+import argparse
+import random
+import time
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+def _synthetic_results(n, seed=42):
+    rng = random.Random(seed)
+    words = ["great", "boring", "plot", "acting", "twist", "slow", "masterpiece", "awful", "funny", "score"]
+    results = []
+    for i in range(n):
+        true_rating = float(rng.randint(1, 10))
+        predicted = round(rng.uniform(1, 10), 1)
+        results.append({
+            "comment": f"review {i}: " + " ".join(rng.choice(words) for _ in range(30)),
+            "true_rating": true_rating,
+            "predicted_rating": predicted,
+            "delta": round(predicted - true_rating, 1)
+        })
+    return results
+
+NORMALIZED_TABLES = ["titles", "reviews", "analysis_runs", "review_analyses", "review_sentiments", "title_monthly_stats"]
+
+def _shadow_tables(db):
+    # temp tables shadow the real ones for this connection only, so nothing is written to them
+    for table in NORMALIZED_TABLES:
+        db.cursor.execute(f"CREATE TEMP TABLE {table} (LIKE public.{table} INCLUDING ALL)")
+    db.conn.commit()
+
+def _truncate(db):
+    db.cursor.execute(f"TRUNCATE {', '.join(NORMALIZED_TABLES)}")
+    db.conn.commit()
+
+def save_row_by_row(db, movie_title, results, title_id="tt0000000"):
+    # the previous write pattern: statements issued one row at a time
+    now = datetime.now(timezone.utc)
+    db.cursor.execute("""
+        INSERT INTO titles (title_id, title) VALUES (%s, %s) ON CONFLICT (title_id) DO NOTHING
+    """, (title_id, movie_title))
+    db.cursor.execute("""
+        INSERT INTO analysis_runs (title_id, started_at, review_count) VALUES (%s, %s, %s) RETURNING id
+    """, (title_id, now, len(results)))
+    run_id = db.cursor.fetchone()[0]
+    for row in results:
+        db.cursor.execute("""
+            INSERT INTO reviews (title_id, review_hash, comment, true_rating)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (title_id, review_hash) DO UPDATE SET true_rating = EXCLUDED.true_rating
+            RETURNING id
+        """, (title_id, comment_hash(row["comment"]), row["comment"], float(row["true_rating"])))
+        review_id = db.cursor.fetchone()[0]
+        db.cursor.execute("""
+            INSERT INTO review_analyses (run_id, review_id, predicted_rating, delta, analysis_timestamp)
+            VALUES (%s, %s, %s, %s, %s)
+        """, (run_id, review_id, float(row["predicted_rating"]), float(row["delta"]), now))
+    db.conn.commit()
+
+def run_benchmark(sizes=DEFAULT_SIZES):
+    db = Postgre()
+    _shadow_tables(db)
+    report = []
+    try:
+        for n in sizes:
+            results = _synthetic_results(n)
+
+            started = time.perf_counter()
+            save_row_by_row(db, "benchmark", results)
+            row_seconds = time.perf_counter() - started
+            _truncate(db)
+
+            started = time.perf_counter()
+            db.save_rating_results("benchmark", results, title_id="tt0000000")
+            bulk_seconds = time.perf_counter() - started
+
+            # second bulk run is a new analysis run over reviews that are all already stored
+            started = time.perf_counter()
+            db.save_rating_results("benchmark", results, title_id="tt0000000")
+            upsert_seconds = time.perf_counter() - started
+            _truncate(db)
+
+            report.append({
+                "rows": n,
+                "row_by_row_rows_per_s": round(n / row_seconds),
+                "bulk_rows_per_s": round(n / bulk_seconds),
+                "bulk_upsert_rows_per_s": round(n / upsert_seconds),
+                "speedup": round(row_seconds / bulk_seconds, 1)
+            })
+            print(f"### {report[-1]} ###")
+    finally:
+        # the connection carries the shadowing temp tables, do not return it to the pool
+        db.close(discard=True)
+    return report
+
+if __name__ == "__main__":
+    # usage: python -m db.benchmark [--sizes 1000 10000 100000]
+    parser = argparse.ArgumentParser(description="Compare row-by-row and bulk writes of rating results.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8}{'row-by-row/s':>15}{'bulk/s':>10}{'upsert/s':>10}{'speedup':>9}")
+    for entry in run_benchmark(args.sizes):
+        print(f"{entry['rows']:>8}{entry['row_by_row_rows_per_s']:>15}{entry['bulk_rows_per_s']:>10}{entry['bulk_upsert_rows_per_s']:>10}{entry['speedup']:>9}")
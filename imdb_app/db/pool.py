@@ -0,0 +1,131 @@
+from psycopg2.pool import ThreadedConnectionPool
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from contextlib import contextmanager
+from db.config import DB_CONFIG
+from db.schema import create_schema
+import threading
+import time
+import os
+
+POOL_MIN = int(os.getenv("DB_POOL_MIN", 1))
+POOL_MAX = int(os.getenv("DB_POOL_MAX", 10))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30)) # seconds to wait for a free connection
+
+class PoolTimeout(Exception):
+    pass
+
+class ConnectionPool:
+    def __init__(self, minconn=POOL_MIN, maxconn=POOL_MAX, timeout=POOL_TIMEOUT, config=DB_CONFIG):
+        self.maxconn = max(1, int(maxconn))
+        self.timeout = timeout
+        self._pool = ThreadedConnectionPool(min(minconn, self.maxconn), self.maxconn, **config)
+        # psycopg2 raises as soon as the pool is empty, the semaphore makes callers wait instead
+        self._slots = threading.BoundedSemaphore(self.maxconn)
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._stats = {
+            "checkouts": 0,
+            "exhausted": 0, # checkouts that found no free connection and had to wait
+            "timeouts": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "discarded": 0
+        }
+
+    def getconn(self):
+        started = time.monotonic()
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats["exhausted"] += 1
+            if not self._slots.acquire(timeout=self.timeout):
+                with self._lock:
+                    self._stats["timeouts"] += 1
+                raise PoolTimeout(f"No database connection free after {self.timeout}s.")
+
+        try:
+            conn = self._pool.getconn()
+            if conn.closed:
+                # dropped by the server: replace it
+                self._pool.putconn(conn, close=True)
+                conn = self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+
+        waited = time.monotonic() - started
+        with self._lock:
+            self._in_use += 1
+            self._stats["checkouts"] += 1
+            self._stats["wait_seconds_total"] += waited
+            self._stats["wait_seconds_max"] = max(self._stats["wait_seconds_max"], waited)
+        return conn
+
+    def putconn(self, conn, discard=False):
+        try:
+            if not discard and not conn.closed and conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                conn.rollback() # never hand out a connection with an open or failed transaction
+        except Exception:
+            discard = True
+        discard = discard or bool(conn.closed)
+        try:
+            self._pool.putconn(conn, close=discard)
+        finally:
+            with self._lock:
+                self._in_use -= 1
+                if discard:
+                    self._stats["discarded"] += 1
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    @contextmanager
+    def transaction(self):
+        # commit on success, roll back on any error
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                yield cursor
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats)
+            checkouts = stats["checkouts"]
+            stats["wait_seconds_avg"] = round(stats["wait_seconds_total"] / checkouts, 4) if checkouts else 0.0
+            stats["wait_seconds_total"] = round(stats["wait_seconds_total"], 3)
+            stats["wait_seconds_max"] = round(stats["wait_seconds_max"], 3)
+            stats["in_use"] = self._in_use
+            stats["max_size"] = self.maxconn
+            return stats
+
+    def close(self):
+        self._pool.closeall()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    # one pool per process, shared by Streamlit sessions and batch pipelines;
+    # the schema is set up once, when the pool is created
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            pool = ConnectionPool()
+            with pool.transaction() as cursor:
+                create_schema(cursor)
+            _pool = pool
+        return _pool
+
+def transaction():
+    return get_pool().transaction()
@@ -1,51 +1,289 @@
-import psycopg2
+from psycopg2.extras import execute_values
 from datetime import datetime, timezone
-from db.config import DB_CONFIG
+from db.pool import get_pool
+from db.schema import ensure_monthly_partitions
+import hashlib
+import csv
+import io
+import re
+
+BULK_PAGE_SIZE = 1000 # rows per multi-row INSERT statement
+COPY_THRESHOLD = 5000 # from this many rows on, stream them with COPY into a staging table
+
+STAGING_COLUMNS = (
+    "review_hash", "comment", "true_rating", "review_date", "predicted_rating", "delta",
+    "sentiment_label", "sentiment_score"
+)
+UNKNOWN_MODEL = "unknown"
+
+def comment_hash(comment):
+    normalized = re.sub(r"\s+", " ", comment or "").strip().lower()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
 
 class Postgre:
+    # repository over a connection borrowed from the process-wide pool;
+    # use as a context manager (or call close()) to give the connection back
     def __init__(self):
-        self.conn = psycopg2.connect(**DB_CONFIG)
+        self.pool = get_pool()
+        self.conn = self.pool.getconn()
         self.cursor = self.conn.cursor()
-        self._create_table_if_not_exists()
 
-    def _create_table_if_not_exists(self):
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS rating_analysis (
-                id SERIAL PRIMARY KEY,
-                movie_title TEXT NOT NULL,
-                comment TEXT NOT NULL,
-                true_rating REAL,
-                predicted_rating REAL,
-                delta REAL,
-                analysis_timestamp TIMESTAMPTZ
-            )
-        """)
-        self.conn.commit()
+    def __enter__(self):
+        return self
 
-    def save_rating_results(self, movie_title, results):
-        now = datetime.now(timezone.utc)
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _prepare_rating_rows(self, results, sentiments=None, review_dates=None):
+        rows = {}
         for row in results:
             # validate data fields
             if not all(k in row for k in ("comment", "true_rating", "predicted_rating", "delta")):
                 continue  # skip incompleted rows
 
             comment = row["comment"] or ""
-            true_rating = float(row["true_rating"])
-            predicted_rating = float(row["predicted_rating"])
-            delta = float(row["delta"])
-
             # validate numbers
-            if not isinstance(true_rating, (int, float)) or not isinstance(predicted_rating, (int, float)):
+            try:
+                true_rating = float(row["true_rating"])
+                predicted_rating = float(row["predicted_rating"])
+                delta = float(row["delta"])
+            except (TypeError, ValueError):
+                continue
+
+            # the same review twice in one batch would hit ON CONFLICT twice, keep the last one
+            key = comment_hash(comment)
+            rows[key] = [key, comment, true_rating, None, predicted_rating, delta, None, None]
+
+        # sentiment results are matched by review hash; reviews without a rating are stored too
+        for result in sentiments or []:
+            comment = result.get("review") or ""
+            if not result.get("label") or not comment.strip():
                 continue
+            key = comment_hash(comment)
+            row = rows.setdefault(key, [key, comment, None, None, None, None, None, None])
+            row[6] = result["label"]
+            row[7] = float(result["score"]) if result.get("score") is not None else None
+
+        # review dates are keyed by the same hash
+        for key, row in rows.items():
+            row[3] = (review_dates or {}).get(key)
+        return [tuple(row) for row in rows.values()]
+
+    def _stage_rows(self, rows):
+        # session-local staging table, emptied at commit
+        self.cursor.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS rating_staging (
+                review_hash TEXT,
+                comment TEXT,
+                true_rating REAL,
+                review_date DATE,
+                predicted_rating REAL,
+                delta REAL,
+                sentiment_label TEXT,
+                sentiment_score REAL
+            ) ON COMMIT DELETE ROWS
+        """)
+        if len(rows) >= COPY_THRESHOLD:
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(rows)
+            buffer.seek(0)
+            self.cursor.copy_expert(
+                f"COPY rating_staging ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+        else:
+            execute_values(
+                self.cursor,
+                f"INSERT INTO rating_staging ({', '.join(STAGING_COLUMNS)}) VALUES %s",
+                rows,
+                page_size=BULK_PAGE_SIZE
+            )
 
+    def save_rating_results(self, movie_title, results, title_id=None, model_version=None,
+                            sentiments=None, sentiment_model=None, review_dates=None):
+        # one transaction: title upsert, new analysis run, deduplicated reviews,
+        # per-review rating results and sentiment results
+        # review_dates: {comment_hash(comment): date}, see core.incremental.review_dates
+        now = datetime.now(timezone.utc)
+        title_id = title_id or movie_title
+        rows = self._prepare_rating_rows(results or [], sentiments, review_dates)
+        if not rows:
+            return 0
+        rated = sum(1 for row in rows if row[4] is not None)
+
+        try:
+            self.cursor.execute("""
+                INSERT INTO titles (title_id, title, updated_at) VALUES (%s, %s, %s)
+                ON CONFLICT (title_id) DO UPDATE SET
+                    title = COALESCE(EXCLUDED.title, titles.title),
+                    updated_at = EXCLUDED.updated_at
+            """, (title_id, movie_title, now))
             self.cursor.execute("""
-                INSERT INTO rating_analysis (
-                    movie_title, comment, true_rating, predicted_rating, delta, analysis_timestamp
-                ) VALUES (%s, %s, %s, %s, %s, %s)
-            """, (movie_title, comment, true_rating, predicted_rating, delta, now))
+                INSERT INTO analysis_runs (title_id, started_at, model_version, review_count)
+                VALUES (%s, %s, %s, %s) RETURNING id
+            """, (title_id, now, model_version, rated))
+            run_id = self.cursor.fetchone()[0]
+
+            ensure_monthly_partitions(self.cursor, now, now)
+            self._stage_rows(rows)
+            # reviews are stored once; a repeat analysis only refreshes their rating/date
+            self.cursor.execute("""
+                INSERT INTO reviews (title_id, review_hash, comment, true_rating, review_date, first_seen)
+                SELECT %s, review_hash, comment, true_rating, review_date, %s FROM rating_staging
+                ON CONFLICT (title_id, review_hash) DO UPDATE SET
+                    true_rating = COALESCE(EXCLUDED.true_rating, reviews.true_rating),
+                    review_date = COALESCE(EXCLUDED.review_date, reviews.review_date)
+            """, (title_id, now))
+            self.cursor.execute("""
+                INSERT INTO review_analyses (run_id, review_id, predicted_rating, delta, analysis_timestamp)
+                SELECT %s, r.id, s.predicted_rating, s.delta, %s
+                FROM rating_staging s
+                JOIN reviews r ON r.title_id = %s AND r.review_hash = s.review_hash
+                WHERE s.predicted_rating IS NOT NULL
+            """, (run_id, now, title_id))
+            self.cursor.execute("""
+                INSERT INTO review_sentiments (review_id, model_version, label, score, analyzed_at)
+                SELECT r.id, %s, s.sentiment_label, s.sentiment_score, %s
+                FROM rating_staging s
+                JOIN reviews r ON r.title_id = %s AND r.review_hash = s.review_hash
+                WHERE s.sentiment_label IS NOT NULL
+                ON CONFLICT (review_id, model_version) DO UPDATE SET
+                    label = EXCLUDED.label,
+                    score = EXCLUDED.score,
+                    analyzed_at = EXCLUDED.analyzed_at
+            """, (sentiment_model or UNKNOWN_MODEL, now, title_id))
+            self._add_monthly_stats(title_id, now)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return rated
+
+    def _add_monthly_stats(self, title_id, now):
+        # fold this run into the per-title, per-month totals (additive, so concurrent saves are safe)
+        self.cursor.execute("""
+            INSERT INTO title_monthly_stats (
+                title_id, month, run_count, review_count, delta_sum, abs_delta_sum,
+                positive_count, negative_count, updated_at
+            )
+            SELECT
+                %s, date_trunc('month', %s::timestamptz AT TIME ZONE 'UTC')::date, 1,
+                COUNT(*) FILTER (WHERE predicted_rating IS NOT NULL),
+                COALESCE(SUM(delta), 0), COALESCE(SUM(abs(delta)), 0),
+                COUNT(*) FILTER (WHERE sentiment_label = 'POSITIVE'),
+                COUNT(*) FILTER (WHERE sentiment_label = 'NEGATIVE'),
+                %s
+            FROM rating_staging
+            ON CONFLICT (title_id, month) DO UPDATE SET
+                run_count = title_monthly_stats.run_count + EXCLUDED.run_count,
+                review_count = title_monthly_stats.review_count + EXCLUDED.review_count,
+                delta_sum = title_monthly_stats.delta_sum + EXCLUDED.delta_sum,
+                abs_delta_sum = title_monthly_stats.abs_delta_sum + EXCLUDED.abs_delta_sum,
+                positive_count = title_monthly_stats.positive_count + EXCLUDED.positive_count,
+                negative_count = title_monthly_stats.negative_count + EXCLUDED.negative_count,
+                updated_at = EXCLUDED.updated_at
+        """, (title_id, now, now))
+
+    def get_monthly_trends(self, title_id=None, months=24):
+        # reads only the precomputed aggregates: one row per month, all titles summed when title_id is None
+        self.cursor.execute("""
+            SELECT
+                month,
+                SUM(run_count),
+                SUM(review_count),
+                SUM(delta_sum),
+                SUM(abs_delta_sum),
+                SUM(positive_count),
+                SUM(negative_count)
+            FROM title_monthly_stats
+            WHERE (%s::text IS NULL OR title_id = %s)
+                AND month >= (date_trunc('month', now() AT TIME ZONE 'UTC') - make_interval(months => %s))::date
+            GROUP BY month
+            ORDER BY month
+        """, (title_id, title_id, int(months) - 1))
+        trends = []
+        for month, runs, reviews, delta_sum, abs_delta_sum, positive, negative in self.cursor.fetchall():
+            labelled = positive + negative
+            trends.append({
+                "month": month.strftime("%Y-%m"),
+                "runs": runs,
+                "reviews": reviews,
+                "mean_delta": round(delta_sum / reviews, 3) if reviews else None,
+                "mean_abs_delta": round(abs_delta_sum / reviews, 3) if reviews else None,
+                "positive": positive,
+                "negative": negative,
+                "positive_share": round(positive / labelled, 3) if labelled else None
+            })
+        return trends
+
+    def get_training_reviews(self, limit=None):
+        # every stored review with a star rating, newest first; returns (comments, ratings)
+        self.cursor.execute("""
+            SELECT comment, true_rating FROM reviews
+            WHERE true_rating IS NOT NULL AND comment <> ''
+            ORDER BY first_seen DESC
+            LIMIT %s
+        """, (limit,))
+        rows = self.cursor.fetchall()
+        return [row[0] for row in rows], [float(row[1]) for row in rows]
 
+    def iter_training_chunks(self, chunk_size, after_id=0):
+        # server-side cursor: rated reviews arrive in chunks of chunk_size, in id order so a run can resume
+        cursor = self.conn.cursor(name="training_reviews")
+        cursor.itersize = chunk_size
+        try:
+            cursor.execute("""
+                SELECT id, comment, true_rating FROM reviews
+                WHERE true_rating IS NOT NULL AND comment <> '' AND id > %s
+                ORDER BY id
+            """, (after_id,))
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+            self.conn.rollback() # ends the read transaction that held the cursor
+
+    def get_stored_sentiments(self, title_id, texts, model_version):
+        # sentiment results already stored for these reviews by the same model, keyed by review hash
+        hashes = list({comment_hash(text) for text in texts})
+        if not hashes or not model_version:
+            return {} # results of an unidentified model are never reused
+        self.cursor.execute("""
+            SELECT r.review_hash, s.label, s.score
+            FROM reviews r
+            JOIN review_sentiments s ON s.review_id = r.id AND s.model_version = %s
+            WHERE r.title_id = %s AND r.review_hash = ANY(%s)
+        """, (model_version, title_id, hashes))
+        return {review_hash: {"label": label, "score": score} for review_hash, label, score in self.cursor.fetchall()}
+
+    def get_watermark(self, title_id):
+        # per-title high-water mark of the last incremental harvest
+        self.cursor.execute(
+            "SELECT latest_date, review_hashes FROM review_watermarks WHERE title_id = %s",
+            (title_id,)
+        )
+        row = self.cursor.fetchone()
+        if not row:
+            return None
+        return {"latest_date": row[0], "hashes": list(row[1] or [])}
+
+    def save_watermark(self, title_id, watermark):
+        self.cursor.execute("""
+            INSERT INTO review_watermarks (title_id, latest_date, review_hashes, updated_at)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (title_id) DO UPDATE SET
+                latest_date = EXCLUDED.latest_date,
+                review_hashes = EXCLUDED.review_hashes,
+                updated_at = EXCLUDED.updated_at
+        """, (title_id, watermark["latest_date"], watermark["hashes"], datetime.now(timezone.utc)))
         self.conn.commit()
 
-    def close(self):
+    def close(self, discard=False):
+        if self.conn is None:
+            return
         self.cursor.close()
-        self.conn.close()
+        self.pool.putconn(self.conn, discard=discard)
+        self.conn = None
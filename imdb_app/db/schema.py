@@ -0,0 +1,293 @@
+from datetime import date, datetime, timezone
+import threading
+
+SCHEMA_LOCK_ID = 7_390_001 # advisory lock: only one process runs DDL/migrations at a time
+PARTITIONS_AHEAD = 1 # months of review_analyses partitions created in advance
+
+# review hash as computed by db.postgre.comment_hash, for rows written before it existed
+SQL_COMMENT_HASH = "encode(sha256(convert_to(lower(btrim(regexp_replace(comment, '\\s+', ' ', 'g'))), 'UTF8')), 'hex')"
+
+def _create_legacy_tables(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS rating_analysis (
+            id SERIAL PRIMARY KEY,
+            movie_title TEXT NOT NULL,
+            comment TEXT NOT NULL,
+            true_rating REAL,
+            predicted_rating REAL,
+            delta REAL,
+            analysis_timestamp TIMESTAMPTZ
+        )
+    """)
+    # uniqueness key for idempotent saves: title ID + review hash
+    cursor.execute("ALTER TABLE rating_analysis ADD COLUMN IF NOT EXISTS title_id TEXT")
+    cursor.execute("ALTER TABLE rating_analysis ADD COLUMN IF NOT EXISTS review_hash TEXT")
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS rating_analysis_title_review_key
+        ON rating_analysis (title_id, review_hash)
+    """)
+
+def _create_normalized_tables(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS titles (
+            title_id TEXT PRIMARY KEY,
+            title TEXT,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+    # each review text is stored once per title, keyed by its content hash
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS reviews (
+            id BIGSERIAL PRIMARY KEY,
+            title_id TEXT NOT NULL REFERENCES titles (title_id),
+            review_hash TEXT NOT NULL,
+            comment TEXT NOT NULL,
+            true_rating REAL,
+            review_date DATE,
+            first_seen TIMESTAMPTZ NOT NULL DEFAULT now(),
+            UNIQUE (title_id, review_hash)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS analysis_runs (
+            id BIGSERIAL PRIMARY KEY,
+            title_id TEXT NOT NULL REFERENCES titles (title_id),
+            started_at TIMESTAMPTZ NOT NULL,
+            model_version TEXT,
+            review_count INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    _create_review_analyses(cursor)
+    # BERT results per review and sentiment model, reused instead of running inference again
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS review_sentiments (
+            review_id BIGINT NOT NULL REFERENCES reviews (id),
+            model_version TEXT NOT NULL,
+            label TEXT NOT NULL,
+            score REAL,
+            analyzed_at TIMESTAMPTZ NOT NULL,
+            PRIMARY KEY (review_id, model_version)
+        )
+    """)
+
+    # title and date lookups
+    cursor.execute("CREATE INDEX IF NOT EXISTS reviews_review_date_idx ON reviews (title_id, review_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS analysis_runs_title_started_idx ON analysis_runs (title_id, started_at DESC)")
+
+REVIEW_ANALYSES_INDEXES = ["review_analyses_review_idx", "review_analyses_timestamp_idx", "review_analyses_abs_delta_idx"]
+
+def _create_review_analyses(cursor):
+    # monthly range partitions on analysis_timestamp; the key has to be part of the primary key
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS review_analyses (
+            run_id BIGINT NOT NULL REFERENCES analysis_runs (id) ON DELETE CASCADE,
+            review_id BIGINT NOT NULL REFERENCES reviews (id),
+            predicted_rating REAL,
+            delta REAL,
+            analysis_timestamp TIMESTAMPTZ NOT NULL,
+            PRIMARY KEY (run_id, review_id, analysis_timestamp)
+        ) PARTITION BY RANGE (analysis_timestamp)
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS review_analyses_review_idx ON review_analyses (review_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS review_analyses_timestamp_idx ON review_analyses (analysis_timestamp)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS review_analyses_abs_delta_idx ON review_analyses ((abs(delta)) DESC)")
+
+def _month_start(value, offset=0):
+    # months are UTC months, whatever the server or session time zone
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    month = value.year * 12 + value.month - 1 + offset
+    return date(month // 12, month % 12 + 1, 1)
+
+def _utc_bound(month):
+    # a plain date bound would be read in the session time zone
+    return datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+
+def partition_name(month):
+    return f"review_analyses_y{month.year}m{month.month:02d}"
+
+_known_partitions = set()
+_partitions_lock = threading.Lock()
+
+def ensure_monthly_partitions(cursor, start, end):
+    # creates the review_analyses partitions covering start..end (dates or timestamps), if missing
+    month = _month_start(start)
+    last = _month_start(end)
+    while month <= last:
+        name = partition_name(month)
+        if name not in _known_partitions:
+            cursor.execute("SELECT to_regclass(%s)", (name,))
+            if cursor.fetchone()[0] is None:
+                # serialized with the other DDL, two writers may reach a new month together;
+                # not cached yet: the caller's transaction could still roll the partition back
+                cursor.execute("SELECT pg_advisory_xact_lock(%s)", (SCHEMA_LOCK_ID,))
+                cursor.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {name} PARTITION OF review_analyses
+                    FOR VALUES FROM (%s) TO (%s)
+                """, (_utc_bound(month), _utc_bound(_month_start(month, 1))))
+                print(f"### Created partition {name} ###")
+            else:
+                with _partitions_lock:
+                    _known_partitions.add(name)
+        month = _month_start(month, 1)
+
+def _create_aggregate_tables(cursor):
+    # per-title, per-month running totals kept up to date by every save; trend reads never touch raw rows
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS title_monthly_stats (
+            title_id TEXT NOT NULL REFERENCES titles (title_id),
+            month DATE NOT NULL,
+            run_count INTEGER NOT NULL DEFAULT 0,
+            review_count INTEGER NOT NULL DEFAULT 0,
+            delta_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+            abs_delta_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+            positive_count INTEGER NOT NULL DEFAULT 0,
+            negative_count INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            PRIMARY KEY (title_id, month)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS title_monthly_stats_month_idx ON title_monthly_stats (month)")
+
+def _create_support_tables(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS review_watermarks (
+            title_id TEXT PRIMARY KEY,
+            latest_date DATE,
+            review_hashes TEXT[] NOT NULL DEFAULT '{}',
+            updated_at TIMESTAMPTZ
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            name TEXT PRIMARY KEY,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+
+def migrate_rating_analysis(cursor):
+    # copy the flat rating_analysis rows into titles / reviews / analysis_runs / review_analyses;
+    # rows without a title ID are keyed by their free-text title, as save_rating_results does
+    cursor.execute("""
+        CREATE TEMP TABLE legacy_rows ON COMMIT DROP AS
+        SELECT
+            COALESCE(title_id, movie_title) AS title_id,
+            movie_title,
+            comment,
+            COALESCE(review_hash, {hash}) AS review_hash,
+            true_rating,
+            predicted_rating,
+            delta,
+            COALESCE(analysis_timestamp, now()) AS analysis_timestamp
+        FROM rating_analysis
+    """.format(hash=SQL_COMMENT_HASH))
+
+    cursor.execute("""
+        INSERT INTO titles (title_id, title)
+        SELECT DISTINCT ON (title_id) title_id, movie_title
+        FROM legacy_rows
+        ORDER BY title_id, analysis_timestamp DESC
+        ON CONFLICT (title_id) DO NOTHING
+    """)
+    cursor.execute("""
+        INSERT INTO reviews (title_id, review_hash, comment, true_rating, first_seen)
+        SELECT DISTINCT ON (title_id, review_hash) title_id, review_hash, comment, true_rating, analysis_timestamp
+        FROM legacy_rows
+        ORDER BY title_id, review_hash, analysis_timestamp
+        ON CONFLICT (title_id, review_hash) DO NOTHING
+    """)
+    # one analysis run per title and analysis timestamp (each save used a single timestamp)
+    cursor.execute("""
+        INSERT INTO analysis_runs (title_id, started_at, model_version, review_count)
+        SELECT title_id, analysis_timestamp, 'legacy', COUNT(*)
+        FROM legacy_rows
+        GROUP BY title_id, analysis_timestamp
+    """)
+    cursor.execute("SELECT min(analysis_timestamp), max(analysis_timestamp) FROM legacy_rows")
+    first, last = cursor.fetchone()
+    if first:
+        ensure_monthly_partitions(cursor, first, last)
+    cursor.execute("""
+        INSERT INTO review_analyses (run_id, review_id, predicted_rating, delta, analysis_timestamp)
+        SELECT DISTINCT ON (run.id, r.id) run.id, r.id, l.predicted_rating, l.delta, l.analysis_timestamp
+        FROM legacy_rows l
+        JOIN analysis_runs run
+            ON run.title_id = l.title_id AND run.started_at = l.analysis_timestamp AND run.model_version = 'legacy'
+        JOIN reviews r
+            ON r.title_id = l.title_id AND r.review_hash = l.review_hash
+        ON CONFLICT DO NOTHING
+    """)
+    cursor.execute("SELECT COUNT(*) FROM legacy_rows")
+    print(f"### Migrated {cursor.fetchone()[0]} rating_analysis rows to the normalized schema ###")
+
+def partition_review_analyses(cursor):
+    # review_analyses created before partitioning: move its rows into the partitioned table
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = 'review_analyses'::regclass")
+    if cursor.fetchone()[0] == "p":
+        return
+    cursor.execute("ALTER TABLE review_analyses RENAME TO review_analyses_unpartitioned")
+    # index names are schema-wide, free them for the partitioned table
+    cursor.execute("ALTER TABLE review_analyses_unpartitioned DROP CONSTRAINT review_analyses_pkey")
+    for index in REVIEW_ANALYSES_INDEXES:
+        cursor.execute(f"DROP INDEX IF EXISTS {index}")
+    _create_review_analyses(cursor)
+
+    cursor.execute("SELECT min(analysis_timestamp), max(analysis_timestamp) FROM review_analyses_unpartitioned")
+    first, last = cursor.fetchone()
+    if first:
+        ensure_monthly_partitions(cursor, first, last)
+    cursor.execute("""
+        INSERT INTO review_analyses (run_id, review_id, predicted_rating, delta, analysis_timestamp)
+        SELECT run_id, review_id, predicted_rating, delta, analysis_timestamp
+        FROM review_analyses_unpartitioned
+    """)
+    print(f"### Moved {cursor.rowcount} review_analyses rows into monthly partitions ###")
+    cursor.execute("DROP TABLE review_analyses_unpartitioned")
+
+def rebuild_title_monthly_stats(cursor, title_id=None):
+    # recomputes the aggregates from the raw rows (sentiment counts are only known for new saves)
+    where = "WHERE run.title_id = %s" if title_id else ""
+    params = (title_id,) if title_id else ()
+    cursor.execute(f"DELETE FROM title_monthly_stats {'WHERE title_id = %s' if title_id else ''}", params)
+    cursor.execute(f"""
+        INSERT INTO title_monthly_stats (title_id, month, run_count, review_count, delta_sum, abs_delta_sum)
+        SELECT
+            run.title_id,
+            date_trunc('month', ra.analysis_timestamp AT TIME ZONE 'UTC')::date,
+            COUNT(DISTINCT ra.run_id),
+            COUNT(*),
+            COALESCE(SUM(ra.delta), 0),
+            COALESCE(SUM(abs(ra.delta)), 0)
+        FROM review_analyses ra
+        JOIN analysis_runs run ON run.id = ra.run_id
+        {where}
+        GROUP BY run.title_id, date_trunc('month', ra.analysis_timestamp AT TIME ZONE 'UTC')
+    """, params)
+    print(f"### Rebuilt {cursor.rowcount} title_monthly_stats rows ###")
+
+MIGRATIONS = [
+    ("0001_normalize_rating_analysis", migrate_rating_analysis),
+    ("0002_partition_review_analyses", partition_review_analyses),
+    ("0003_title_monthly_stats", rebuild_title_monthly_stats),
+]
+
+def _apply_migrations(cursor):
+    cursor.execute("SELECT name FROM schema_migrations")
+    applied = {row[0] for row in cursor.fetchall()}
+    for name, migrate in MIGRATIONS:
+        if name in applied:
+            continue
+        migrate(cursor)
+        cursor.execute("INSERT INTO schema_migrations (name) VALUES (%s)", (name,))
+
+def create_schema(cursor):
+    # idempotent DDL + pending migrations, run once per process when the connection pool is created
+    cursor.execute("SELECT pg_advisory_xact_lock(%s)", (SCHEMA_LOCK_ID,))
+    _create_legacy_tables(cursor)
+    _create_normalized_tables(cursor)
+    _create_support_tables(cursor)
+    _create_aggregate_tables(cursor)
+    _apply_migrations(cursor)
+    today = datetime.now(timezone.utc)
+    ensure_monthly_partitions(cursor, today, _month_start(today, PARTITIONS_AHEAD))
@@ -2,11 +2,13 @@ import streamlit as st
 import pandas as pd
 from collections import Counter
 import plotly.express as px
+import time
 import re
-from core.rating_predictor import train_and_predict_rating
 from db.postgre import Postgre
-from core.sentiment_analysis import analyze_sentiment
-from core.imdb_scraper import search_imdb_titles, get_imdb_reviews, build_imdb_reviews_url
+from core.imdb_scraper import build_imdb_reviews_url
+from core.scrape_cache import cached_search_imdb_titles, STALE
+from core.analysis_job import get_analysis_queue, submit_analysis
+from core.job_queue import QUEUED, RUNNING, FAILED, JOB_POLL_SECONDS
 
 def _format_title_option(result):
     title = result.get("title", "N/A")
@@ -97,35 +99,83 @@ def render_time_series(df):
         font=dict(size=14)
     )
     st.plotly_chart(fig, use_container_width=True)
-
-def render_rating_prediction(reviews):
+
+def render_historical_trends(title_id):
+    # monthly trends of every stored analysis of this title, read from the precomputed aggregates
+    try:
+        with Postgre() as db:
+            trends = db.get_monthly_trends(title_id)
+    except Exception as e:
+        st.warning(f"Could not load historical trends: {e}")
+        return
+
+    if not trends:
+        st.info("No stored analyses yet for this title.")
+        return
+
+    st.subheader("Historical Trends")
+    trend_df = pd.DataFrame(trends)
+    col1, col2 = st.columns(2)
+
+    with col1:
+        delta_fig = px.line(
+            trend_df,
+            x="month",
+            y=["mean_delta", "mean_abs_delta"],
+            markers=True,
+            title="Rating delta per analysis month"
+        )
+        delta_fig.update_layout(xaxis_title="Month", yaxis_title="Delta", template="plotly_white", height=400)
+        st.plotly_chart(delta_fig, use_container_width=True)
+
+    with col2:
+        mix_df = trend_df.melt(id_vars="month", value_vars=["positive", "negative"], var_name="label", value_name="count")
+        mix_df["label"] = mix_df["label"].str.upper()
+        mix_fig = px.bar(
+            mix_df,
+            x="month",
+            y="count",
+            color="label",
+            title="Sentiment mix per analysis month",
+            color_discrete_map={"POSITIVE": "green", "NEGATIVE": "red"}
+        )
+        mix_fig.update_layout(xaxis_title="Month", yaxis_title="Reviews", template="plotly_white", height=400)
+        st.plotly_chart(mix_fig, use_container_width=True)
+
+JOB_STAGES = {
+    "scrape": "Fetching reviews from IMDb...",
+    "sentiment": "Scoring reviews with BERT...",
+    "rating": "Predicting ratings...",
+    "save": "Saving results to PostgreSQL..."
+}
+
+def render_job_progress(job):
+    stage = JOB_STAGES.get(job["stage"], "Waiting for a free worker...")
+    st.progress(min(job["progress"] or 0.0, 1.0), text=stage)
+    if job["submissions"] > 1:
+        st.caption(f"This analysis was requested {job['submissions']} times and is shared by all of them.")
+
+def render_rating_prediction(rating_results, saved=None, save_error=None):
     st.subheader("Rating Prediction Analysis")
 
-    with st.spinner("Training rating prediction model..."):
-        rating_results = train_and_predict_rating(reviews)
-
-    if not rating_results:
+    if rating_results:
+        rating_df = pd.DataFrame(rating_results)
+
+        st.dataframe(
+            rating_df[["true_rating", "predicted_rating", "delta", "comment"]],
+            use_container_width=True,
+            height=400
+        )
+        st.caption("Comparison between actual user ratings and model-predicted scores.")
+    else:
         st.info("Not enough rating data available for training.")
-        return
-
-    rating_df = pd.DataFrame(rating_results)
-
-    st.dataframe(
-        rating_df[["true_rating", "predicted_rating", "delta", "comment"]],
-        use_container_width=True,
-        height=400
-    )
-    st.caption("Comparison between actual user ratings and model-predicted scores.")
-
-    # saving data to db
-    try:
-        movie_title = st.session_state.get("selected_movie_title", "Unknown")
-        db = Postgre()
-        db.save_rating_results(movie_title, rating_results)
-        db.close()
-        st.success("Rating predictions saved to PostgreSQL.")
-    except Exception as e:
-        st.error(f"Error saving to PostgreSQL: {e}")
+
+    # saved by the job itself; sentiment results are stored even without rating predictions
+    if saved:
+        stored = "Rating predictions and sentiment results" if rating_results else "Sentiment results"
+        st.success(f"{stored} saved to PostgreSQL.")
+    elif save_error:
+        st.error(f"Error saving to PostgreSQL: {save_error}")
 
 def run_dashboard():
     st.set_page_config(page_title="IMDb Sentiment Dashboard", layout="wide")
@@ -137,8 +187,6 @@ def run_dashboard():
         st.session_state.search_results = []
     if "selected_option" not in st.session_state:
         st.session_state.selected_option = -1
-    if "reviews_cache" not in st.session_state:
-        st.session_state.reviews_cache = {}
 
     query = st.text_input("Enter the name of the movie or TV series to search:", key="query_input")
     query_clean = (query or "").strip()
@@ -148,10 +196,9 @@ def run_dashboard():
 
     if st.session_state.search_query != query_clean:
         with st.spinner("Searching titles on IMDb..."):
-            st.session_state.search_results = search_imdb_titles(query_clean)
+            st.session_state.search_results, _ = cached_search_imdb_titles(query_clean)
         st.session_state.search_query = query_clean
         st.session_state.selected_option = -1
-        st.session_state.reviews_cache = {}
 
     results = st.session_state.search_results
     if not results:
@@ -166,6 +213,9 @@ def run_dashboard():
         key="selected_option",
     )
 
+    if "jobs" not in st.session_state:
+        st.session_state.jobs = {}
+
     if selected_idx == -1:
         return
 
@@ -177,28 +227,44 @@ def run_dashboard():
         return
 
     title_id = _extract_title_id_from_url(selected_url) or selected_url
-    if title_id not in st.session_state.reviews_cache:
-        st.info("Fetching reviews from IMDb...")
-        fetched_reviews = get_imdb_reviews(review_url)
-        if fetched_reviews:
-            st.session_state.reviews_cache[title_id] = fetched_reviews
-
-    reviews = st.session_state.reviews_cache.get(title_id, [])
-    if not reviews:
+    # the analysis runs in a background job; this run only submits it once per session and polls
+    queue = get_analysis_queue()
+    job_id = st.session_state.jobs.get(title_id)
+    job = queue.get(job_id) if job_id else None
+    if job is None:
+        job_id = submit_analysis(title_id, selected_row.get("title", "Unknown"), review_url)
+        st.session_state.jobs[title_id] = job_id
+        job = queue.get(job_id)
+
+    if job["status"] == FAILED:
         selected_label = _format_title_option(selected_row)
-        st.error(f"No reviews were found for selected title: {selected_label}. Try another result from the list.")
+        st.error(f"Analysis failed for selected title: {selected_label}. {job['error']}")
+        if st.button("Retry analysis"):
+            del st.session_state.jobs[title_id]
+            st.rerun()
         return
 
-    st.success(f"{len(reviews)} reviews retrieved. Starting sentiment analysis with BERT...")
-    comments = [r["comment"] for r in reviews if r["comment"].strip() and r["comment"].strip().upper() != "N/A"]
-    sentiment_results = analyze_sentiment(comments)
+    running = job["status"] in (QUEUED, RUNNING)
+    if running:
+        render_job_progress(job)
+
+    result = job["result"] or {}
+    reviews = result.get("reviews") or []
+    sentiment_results = result.get("sentiment") or []
+    if reviews and result.get("cache_status") == STALE:
+        st.caption("Showing cached reviews while a fresh copy is scraped in the background.")
+    if reviews and not running:
+        st.success(f"{len(reviews)} reviews retrieved and analyzed.")
 
     if not sentiment_results:
+        if running:
+            time.sleep(JOB_POLL_SECONDS)
+            st.rerun()
         st.error("No results returned from the sentiment model.")
         return
 
     # calculate aggregated sentiment metrics
-    labels = [r["label"] for r in sentiment_results]
+    labels = [r["label"] for r in sentiment_results if r["label"]]
     scores = [r["score"] for r in sentiment_results if r["score"] is not None]
     average_score = round(sum(scores) / len(scores), 3) if scores else 0
     counts = Counter(labels)
@@ -207,5 +273,11 @@ def run_dashboard():
     render_metrics_and_pie_chart(counts, average_score)
     df = render_review_table(sentiment_results, reviews)
     render_time_series(df)
-    st.session_state.selected_movie_title = selected_row.get("title", "Unknown")
-    render_rating_prediction(reviews)
+
+    if running:
+        # partial results so far; poll again for the rest
+        time.sleep(JOB_POLL_SECONDS)
+        st.rerun()
+
+    render_rating_prediction(result.get("rating_results"), result.get("saved"), result.get("save_error"))
+    render_historical_trends(title_id)